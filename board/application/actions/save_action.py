@@ -1,22 +1,113 @@
 from board.infrastructure.django.models import Drawing
+from board.application.use_cases import board_events
+from django.conf import settings
 from django.utils import timezone
-import cv2
-import numpy as np
 import os
 
 # Estado en memoria para la sesión actual
 current_strokes = []
 current_drawing = None
 unsaved_changes = False
+revision = 0  # aumenta con cada cambio de current_strokes (para los clientes vectoriales)
+_stroke_index = None  # índice espacial de current_strokes (se crea al primer uso)
+_frame_size = None    # (ancho, alto) del primer fotograma: lienzo en vivo si no se declara uno
+_loaded_revision = None  # revisión con la que current_strokes salió de current_drawing (sin cambios desde la carga)
 
 # ===============================
 # 🔹 RESET Y GESTIÓN DE ESTADO
 # ===============================
 
+def has_unsaved_changes():
+    """Hay cambios sin guardar solo si el lienzo tiene trazos."""
+    return bool(current_strokes) and unsaved_changes
+
+
+def set_unsaved(value):
+    """Marca el estado de cambios sin guardar y lo notifica a los clientes."""
+    global unsaved_changes
+    unsaved_changes = value
+    notify_unsaved()
+
+
+def notify_unsaved():
+    board_events.publish("unsaved", unsaved=has_unsaved_changes())
+
+
+def get_stroke_index():
+    """
+    Índice espacial de current_strokes para consultas por región y bajo el puntero.
+    Se crea al primer uso (carga numpy/OpenCV) y desde entonces se mantiene al día.
+    """
+    global _stroke_index
+    if _stroke_index is None:
+        from board.application.use_cases.stroke_index import StrokeIndex
+        _stroke_index = StrokeIndex(getattr(settings, "BOARD_CANVAS", {}).get("TILE_SIZE", 64))
+        _stroke_index.rebuild(current_strokes)
+    return _stroke_index
+
+
+def canvas_size():
+    """
+    Tamaño (ancho, alto) del lienzo en vivo: current_strokes está en sus píxeles.
+    BOARD_CANVAS WIDTH/HEIGHT si se declaran; si no, el del primer fotograma de la cámara
+    (mismas proporciones, así un círculo no sale elíptico) o, antes de recibirlo, el
+    configurado en el origen de fotogramas. Los dibujos se guardan normalizados.
+    """
+    config = getattr(settings, "BOARD_CANVAS", {})
+    if config.get("WIDTH") and config.get("HEIGHT"):
+        return int(config["WIDTH"]), int(config["HEIGHT"])
+    if _frame_size is not None:
+        return _frame_size
+    source = getattr(settings, "BOARD_FRAME_SOURCE", {})
+    return int(source.get("WIDTH") or 640), int(source.get("HEIGHT") or 480)
+
+
+def adopt_frame_size(width, height):
+    """
+    Registra el tamaño del primer fotograma como lienzo en vivo. Si eso cambia el
+    tamaño del lienzo, los trazos recién cargados se vuelven a derivar de las coordenadas
+    guardadas del dibujo (un solo redondeo, sin encoger los que ya se ajustaron al lienzo
+    provisional). Trazos ya editados solo se reescalan si el lienzo conserva sus proporciones.
+    """
+    global _frame_size, current_strokes
+    if _frame_size is not None:
+        return
+    old = canvas_size()
+    _frame_size = (int(width), int(height))
+    new = canvas_size()
+    if new == old or not current_strokes:
+        return
+    from board.application.use_cases.stroke_coordinates import drawing_strokes, scale_strokes
+
+    if current_drawing is not None and revision == _loaded_revision:
+        current_strokes = drawing_strokes(current_drawing, *new)
+    elif new[0] * old[1] == new[1] * old[0]:
+        current_strokes = scale_strokes(current_strokes, (new[0] / old[0], new[1] / old[1]))
+    else:
+        return
+    _reindex()
+    _strokes_changed("board_reset")
+
+
+def _reindex():
+    if _stroke_index is not None:
+        _stroke_index.rebuild(current_strokes)
+
+
+def _strokes_changed(event_type, **payload):
+    """Avanza la revisión de los trazos y publica el cambio."""
+    global revision
+    revision += 1
+    board_events.publish(event_type, revision=revision, **payload)
+
+
 def reset_strokes():
     """Limpia los trazos sin eliminar el dibujo actual."""
     global current_strokes
     current_strokes = []
+    _reindex()
+    _strokes_changed("board_reset")
+    notify_unsaved()
 
 
 def reset_globals():
@@ -24,6 +115,9 @@ def reset_globals():
     global current_drawing, current_strokes
     current_drawing = None
     current_strokes = []
+    _reindex()
+    _strokes_changed("board_reset")
+    notify_unsaved()
 
 
 # ===============================
@@ -37,103 +131,305 @@ def start_new_drawing(name="Untitled", width=640, height=480):
     global current_strokes, current_drawing
     current_strokes = []
     current_drawing = None
+    _reindex()
+    _strokes_changed("board_reset")
+    notify_unsaved()
     print("[INFO] Nuevo lienzo temporal creado (sin guardar aún).")
     return None
 
 
 def load_drawing(drawing_id):
     """Carga un dibujo existente y sus trazos en memoria."""
-    global current_drawing, current_strokes
+    global current_drawing, current_strokes, _loaded_revision
     try:
+        from board.application.use_cases.stroke_coordinates import drawing_strokes
+
         current_drawing = Drawing.objects.get(id=drawing_id)
-        current_strokes = current_drawing.strokes or []
+        # Coordenadas guardadas (relativas, o píxeles en dibujos antiguos) → píxeles del lienzo en vivo
+        current_strokes = drawing_strokes(current_drawing, *canvas_size())
         print(f"[INFO] Dibujo cargado: {current_drawing.name} (ID: {current_drawing.id}) con {len(current_strokes)} trazos.")
     except Drawing.DoesNotExist:
         print(f"[ERROR] No se encontró el dibujo con ID {drawing_id}")
         current_drawing = None
         current_strokes = []
+    _reindex()
+    _strokes_changed("board_reset")
+    _loaded_revision = revision if current_drawing is not None else None
+    notify_unsaved()
 
 
 # ===============================
 # 🔹 TRAZOS Y GUARDADO
 # ===============================
 
-def add_stroke(points, color, thickness):
-    global current_strokes, current_drawing, unsaved_changes
+def add_stroke(points, color, thickness, shape=None, mode="draw"):
+    global current_strokes, current_drawing
 
     stroke = {
         "points": points,
         "color": [int(c) for c in color],
         "thickness": int(thickness),
+        "mode": mode,
     }
     current_strokes.append(stroke)
-    unsaved_changes = True
+    if _stroke_index is not None:
+        _stroke_index.add(stroke)
+    _strokes_changed("shape_add" if shape else "stroke_add",
+                     index=len(current_strokes) - 1, stroke=stroke, shape=shape)
+    set_unsaved(True)
 
     print(f"[TRACE] Trazo agregado: total {len(current_strokes)} trazos.")
     return stroke
 
 
-def save_current_drawing(name="Untitled", width=640, height=480):
+def pop_stroke():
+    """Quita el último trazo (deshacer) y lo devuelve, o None si no hay trazos."""
+    if not current_strokes:
+        return None
+    stroke = current_strokes.pop()
+    if _stroke_index is not None:
+        _stroke_index.remove(stroke)
+    _strokes_changed("undo", index=len(current_strokes))
+    return stroke
+
+
+def restore_stroke(stroke):
+    """Vuelve a agregar un trazo deshecho (rehacer)."""
+    current_strokes.append(stroke)
+    if _stroke_index is not None:
+        _stroke_index.add(stroke)
+    _strokes_changed("redo", index=len(current_strokes) - 1, stroke=stroke)
+
+
+# ===============================
+# 🔹 BORRADOR VECTORIAL
+# ===============================
+
+class StrokeEdit:
+    """
+    Cambio de trazos en medio de current_strokes (borrador vectorial): cada trazo
+    original se reemplaza en su lugar por sus trozos (ninguno si se borró entero).
+    Guarda las posiciones y el orden en el índice para poder deshacerlo y rehacerlo.
+    """
+
+    def __init__(self, replacements, positions, orders):
+        self.replacements = replacements  # [(trazo original, [trozos])] en orden de dibujo
+        self.positions = positions        # posición de cada original antes del cambio
+        self.orders = orders              # clave de orden de cada original en el índice
+        self.stroke_count = None          # len(current_strokes) tras aplicarlo (lo fija el historial)
+
+    @property
+    def first_index(self):
+        """Primera posición de current_strokes que cambia."""
+        return self.positions[0]
+
+    def strokes(self):
+        """Todos los trazos involucrados: originales y trozos."""
+        for original, pieces in self.replacements:
+            yield original
+            yield from pieces
+
+
+def erase_along(path, size):
+    """
+    Borrador vectorial: corta los trazos que toca el recorrido path (grosor size) y los
+    reemplaza por los trozos que quedan, en vez de agregar un trazo blanco encima.
+    Los candidatos salen del índice espacial. Devuelve el StrokeEdit aplicado, o None.
+    """
+    from board.application.use_cases.vector_eraser import split_stroke
+    from board.infrastructure.opencv.stroke_renderer import is_eraser
+
+    index = get_stroke_index()
+    replacements = []
+    for stroke in index.strokes_in_cells(index.cells_for(path, size)):
+        # Los trazos blancos de dibujos antiguos ya borran: cortarlos destaparía tinta
+        if is_eraser(stroke):
+            continue
+        pieces = split_stroke(stroke, path, size / 2.0)
+        if pieces is not None:
+            replacements.append((stroke, pieces))
+    if not replacements:
+        return None
+
+    wanted = {id(original) for original, _ in replacements}
+    positions = [i for i, stroke in enumerate(current_strokes) if id(stroke) in wanted]
+    edit = StrokeEdit(replacements, positions, [index.order_of(original) for original, _ in replacements])
+    apply_edit(edit)
+    set_unsaved(True)
+
+    print(f"[TRACE] Borrador: {len(replacements)} trazos cortados, total {len(current_strokes)} trazos.")
+    return edit
+
+
+def apply_edit(edit, undo=False):
+    """
+    Aplica un StrokeEdit sobre current_strokes y el índice espacial (undo=True lo revierte)
+    y lo publica como strokes_edit con los reemplazos [posición, cuántos quita, trazos nuevos],
+    en orden. Devuelve False sin tocar nada si los trazos ya no están donde el cambio espera.
+    """
+    steps, shift = [], 0
+    for (original, pieces), position in zip(edit.replacements, edit.positions):
+        old, new = (pieces, [original]) if undo else ([original], pieces)
+        at = position + shift if undo else position
+        window = current_strokes[at:at + len(old)]
+        if len(window) != len(old) or any(a is not b for a, b in zip(window, old)):
+            return False
+        steps.append((at, old, new))
+        shift += len(pieces) - 1
+
+    index = get_stroke_index()
+    strokes, splices, start = [], [], 0
+    for (at, old, new), order in zip(steps, edit.orders):
+        strokes.extend(current_strokes[start:at])
+        splices.append([len(strokes), len(old), new])
+        strokes.extend(new)
+        start = at + len(old)
+        if undo:
+            for piece in old:
+                index.remove(piece)
+            index.add(new[0], order)
+        else:
+            index.replace(old[0], new)
+    strokes.extend(current_strokes[start:])
+    current_strokes[:] = strokes
+    _strokes_changed("strokes_edit", splices=splices)
+    return True
+
+
+def save_current_drawing(name="Untitled", width=None, height=None):
     """
     Guarda el dibujo actual en la base de datos solo si hay trazos.
     Si no existe un Drawing aún, lo crea.
+    Los trazos se guardan normalizados contra el lienzo declarado (por defecto, el lienzo en vivo).
     """
-    global current_drawing, current_strokes, unsaved_changes
+    global current_drawing, current_strokes
+    from board.application.use_cases.stroke_coordinates import normalize_strokes
 
     if not current_strokes:
         print("[⚠] Dibujo vacío, no se guardará.")
         return None
 
+    if width is None or height is None:
+        width, height = canvas_size()
+    strokes = normalize_strokes(current_strokes, width, height)
+
     # 🔹 Crear nuevo dibujo si no existe
     if current_drawing is None:
         current_drawing = Drawing.objects.create(
             name=name,
             width=width,
             height=height,
-            strokes=current_strokes,
+            strokes=strokes,
+            normalized=True,
         )
         print(f"[SAVE] Dibujo nuevo creado (ID={current_drawing.id})")
     else:
-        # 🔹 Actualizar dibujo existente
+        # 🔹 Actualizar dibujo existente (un dibujo antiguo en píxeles queda normalizado)
         current_drawing.name = name
-        current_drawing.strokes = current_strokes
-        current_drawing.save(update_fields=["name", "strokes", "updated_at"])
+        current_drawing.strokes = strokes
+        current_drawing.width = width
+        current_drawing.height = height
+        current_drawing.normalized = True
+        current_drawing.save(update_fields=["name", "strokes", "width", "height", "normalized", "updated_at"])
         print(f"[UPDATE] Dibujo existente actualizado (ID={current_drawing.id})")
 
     # 🔹 Generar miniatura
     try:
-        img = render_strokes(current_strokes, current_drawing.width, current_drawing.height)
-        thumb_path = os.path.join("media/thumbs", f"thumb_{current_drawing.id}.jpg")
-        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
-        cv2.imwrite(thumb_path, img)
-
-        # Asignar ruta relativa para que Django pueda servirla
-        current_drawing.thumbnail = f"thumbs/thumb_{current_drawing.id}.jpg"
-        current_drawing.save(update_fields=["thumbnail"])
+        save_thumbnail(current_drawing)
         print(f"[🖼] Miniatura generada: {current_drawing.thumbnail}")
     except Exception as e:
         print(f"[ERROR] No se pudo generar miniatura: {e}")
 
-    unsaved_changes = False
+    set_unsaved(False)
 
     print(f"[💾] Dibujo guardado correctamente: '{current_drawing.name}' (ID={current_drawing.id})")
     return current_drawing
 
 
+def save_named_drawing(name, user):
+    """
+    Guarda el dibujo actual con el nombre elegido por el usuario.
+    Rechaza lienzos vacíos y nombres repetidos entre los dibujos del usuario.
+    Devuelve un dict listo para enviar como JSON.
+    """
+    drawing_name = (name or "").strip() or "Dibujo sin título"
+
+    # Verificar si hay trazos
+    if not current_strokes:
+        return {
+            "success": False,
+            "message": "No se puede guardar un dibujo vacío"
+        }
+
+    # 🔹 VERIFICAR SI YA EXISTE OTRO DIBUJO CON ESE NOMBRE
+    all_drawings = Drawing.objects.filter(user=user)
+
+    # 🔹 IMPORTANTE: Excluir el dibujo actual de la búsqueda (si existe)
+    if current_drawing and current_drawing.id:
+        all_drawings = all_drawings.exclude(id=current_drawing.id)
+
+    # Comparar nombres en minúsculas
+    for drawing in all_drawings:
+        if drawing.name.lower() == drawing_name.lower():
+            return {
+                "success": False,
+                "message": f"Ya existe un dibujo con el nombre '{drawing_name}'. Por favor elige otro nombre.",
+                "duplicate": True
+            }
+
+    # 🔹 GUARDAR (siempre actualiza si existe, o crea nuevo si no existe)
+    drawing = save_current_drawing(name=drawing_name)
+
+    if drawing:
+        drawing.user = user
+        drawing.save(update_fields=["user"])
+        return {
+            "success": True,
+            "message": f"Dibujo '{drawing_name}' guardado correctamente",
+            "drawing_id": drawing.id
+        }
+    return {
+        "success": False,
+        "message": "Error al guardar el dibujo"
+    }
+
+
 # ===============================
 # 🔹 RENDERIZADO DE TRAZOS
 # ===============================
 
 def render_strokes(strokes, width, height):
-    """Crea una imagen desde los trazos guardados."""
-    if not strokes:
-        return np.ones((height, width, 3), np.uint8) * 255
-
-    canvas = np.ones((height, width, 3), np.uint8) * 255
-    for stroke in strokes:
-        color = tuple(int(c) for c in stroke["color"])
-        thickness = int(stroke["thickness"])
-        pts = stroke["points"]
-        for i in range(1, len(pts)):
-            cv2.line(canvas, tuple(pts[i - 1]), tuple(pts[i]), color, thickness)
-    return canvas
+    """Crea una imagen desde trazos en píxeles de un lienzo width x height."""
+    # OpenCV se importa al dibujar, no al cargar las vistas CRUD
+    from board.infrastructure.opencv import stroke_renderer
+
+    return stroke_renderer.render_strokes(strokes or [], width, height)
+
+
+def render_drawing(drawing, width=None, height=None):
+    """
+    Imagen de un dibujo guardado rasterizada directo al tamaño de salida (con sus
+    proporciones si solo se da el ancho o el alto): miniaturas y exportación en alta
+    resolución cuestan según los píxeles que producen, no según el lienzo original.
+    """
+    from board.application.use_cases.stroke_coordinates import drawing_scale, fit_size
+    from board.infrastructure.opencv import stroke_renderer
+
+    if width is None or height is None:
+        width, height = fit_size(drawing, width, height)
+    return stroke_renderer.render_strokes(drawing.strokes or [], width, height,
+                                          scale=drawing_scale(drawing, width, height))
+
+
+def save_thumbnail(drawing):
+    """Genera la miniatura del dibujo (THUMBNAIL_WIDTH de ancho) y la asigna al modelo."""
+    import cv2
+
+    img = render_drawing(drawing, width=getattr(settings, "BOARD_CANVAS", {}).get("THUMBNAIL_WIDTH", 320))
+    thumb_path = os.path.join(settings.MEDIA_ROOT, "thumbs", f"thumb_{drawing.id}.jpg")
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    cv2.imwrite(thumb_path, img)
+
+    # Asignar ruta relativa para que Django pueda servirla
+    drawing.thumbnail = f"thumbs/thumb_{drawing.id}.jpg"
+    drawing.save(update_fields=["thumbnail"])
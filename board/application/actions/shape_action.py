@@ -275,7 +275,7 @@ def add_shape_to_strokes(start, end, color, thickness):
         points.append(points[0])
 
     if points:
-        save_action.add_stroke(points, color, thickness)
+        save_action.add_stroke(points, color, thickness, shape=shape_selected)
 
 
 # ----------------------
@@ -299,4 +299,4 @@ def draw_temporary_shape(canvas, current_pos, color, thickness):
 
     temp_canvas = canvas.copy()
     draw_shape(temp_canvas, adjusted_start, adjusted_end, color, thickness)
-    return temp_canvas
\ No newline at end of file
+    return temp_canvas
\ No newline at end of file
@@ -23,22 +23,51 @@ def register_stroke(stroke):
     undo_stack.append(stroke.copy())
     redo_stack.clear()  # limpiar rehacer cada vez que se dibuja algo nuevo
 
+def register_edit(edit):
+    """Registrar un borrado vectorial: se deshace antes que los trazos anteriores a él."""
+    edit.stroke_count = len(save_action.current_strokes)
+    undo_stack.append(edit)
+
+def _pending_edit():
+    """Borrado vectorial a deshacer si es el cambio más reciente (sin trazos agregados después)."""
+    count = len(save_action.current_strokes)
+    # Los que quedaron con más trazos que el lienzo son de un dibujo anterior
+    while undo_stack and isinstance(undo_stack[-1], save_action.StrokeEdit) \
+            and undo_stack[-1].stroke_count > count:
+        undo_stack.pop()
+    if undo_stack and isinstance(undo_stack[-1], save_action.StrokeEdit) \
+            and undo_stack[-1].stroke_count == count:
+        return undo_stack[-1]
+    return None
+
 def undo_last_stroke():
-    """Deshacer el trazo más reciente."""
+    """
+    Deshacer el cambio más reciente: un borrado vectorial o el último trazo.
+    Devuelve el StrokeEdit revertido, el trazo quitado, o False.
+    """
     if not can_perform():
         return False
 
+    edit = _pending_edit()
+    if edit is not None:
+        undo_stack.pop()
+        if save_action.apply_edit(edit, undo=True):
+            redo_stack.append(edit)
+            print(f"[UNDO] Deshecho borrado, quedan {len(save_action.current_strokes)} trazos activos.")
+            return edit
+        print("[UNDO] El borrado ya no coincide con el dibujo, se descarta.")
+
     if not save_action.current_strokes:
         print("[UNDO] No hay trazos para deshacer.")
         return False
 
-    stroke = save_action.current_strokes.pop()  # quitar último trazo
+    stroke = save_action.pop_stroke()  # quitar último trazo
     redo_stack.append(stroke)
     print(f"[UNDO] Deshecho trazo, quedan {len(save_action.current_strokes)} trazos activos.")
-    return True
+    return stroke
 
 def redo_last_stroke():
-    """Rehacer el trazo más recientemente deshecho."""
+    """Rehacer el trazo (o borrado) más recientemente deshecho. Devuelve el StrokeEdit, True o False."""
     if not can_perform():
         return False
 
@@ -47,7 +76,15 @@ def redo_last_stroke():
         return False
 
     stroke = redo_stack.pop()
-    save_action.current_strokes.append(stroke)
+    if isinstance(stroke, save_action.StrokeEdit):
+        if not save_action.apply_edit(stroke):
+            print("[REDO] El borrado ya no coincide con el dibujo, se descarta.")
+            return False
+        register_edit(stroke)
+        print(f"[REDO] Rehecho borrado, total {len(save_action.current_strokes)} trazos activos.")
+        return stroke
+
+    save_action.restore_stroke(stroke)
     print(f"[REDO] Rehecho trazo, total {len(save_action.current_strokes)} trazos activos.")
     return True
 
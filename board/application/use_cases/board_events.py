@@ -0,0 +1,32 @@
+import threading
+
+# Suscriptores a los cambios de estado de la pizarra (p. ej. el canal WebSocket)
+_listeners = []
+_lock = threading.Lock()
+
+
+def subscribe(callback):
+    """Registra callback(event) para recibir cada evento publicado."""
+    with _lock:
+        _listeners.append(callback)
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def publish(event_type, **payload):
+    """
+    Publica un evento {"type": event_type, ...} a todos los suscriptores.
+    Se llama desde los hilos del motor: los callbacks deben ser rápidos.
+    """
+    event = {"type": event_type, **payload}
+    with _lock:
+        listeners = list(_listeners)
+    for callback in listeners:
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"[ERROR] Suscriptor de eventos falló: {e}")
@@ -0,0 +1,163 @@
+import queue
+import threading
+from contextlib import nullcontext
+
+import numpy as np
+
+
+class FramePacket:
+    """Fotograma que recorre las etapas del pipeline junto con sus resultados parciales."""
+
+    def __init__(self, seq, timestamp, frame):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+        self.hands = []       # manos detectadas o extrapoladas (etapa de inferencia)
+        self.output = None    # imagen compuesta (etapas de lógica y composición)
+        self.view = None      # estado de UI del fotograma (puntero, modo, botón activo…)
+        self.jpeg = None      # bytes codificados (etapa de codificación)
+
+
+class BufferRing:
+    """
+    Buffers preasignados que se entregan en rotación para usarlos como dst= de OpenCV.
+    Se reservan una vez por resolución; size debe cubrir los paquetes en vuelo
+    (colas + etapas + lectores), porque un buffer se reescribe size entregas después.
+    """
+
+    def __init__(self, size=2):
+        self.size = size
+        self._buffers = []
+        self._shape = None
+        self._dtype = None
+        self._next = 0
+
+    def next(self, shape, dtype=np.uint8):
+        if shape != self._shape or dtype != self._dtype:
+            self._buffers = [np.empty(shape, dtype) for _ in range(self.size)]
+            self._shape, self._dtype = shape, dtype
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % self.size
+        return buffer
+
+
+class LatestQueue(queue.Queue):
+    """Cola acotada que descarta el elemento más antiguo cuando está llena."""
+
+    def __init__(self, maxsize=1):
+        super().__init__(maxsize=maxsize)
+        self.dropped = 0
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class FramePipeline:
+    """
+    Pipeline de etapas conectadas por colas acotadas, cada una en su propio hilo.
+    La fuente produce paquetes (o None si aún no hay fotograma, StopIteration al terminar)
+    y cada etapa recibe un paquete y devuelve el paquete procesado (o None para descartarlo).
+    Si una etapa se atrasa, las colas descartan los fotogramas viejos en vez de acumularlos.
+    """
+
+    def __init__(self, source, stages, maxsize=1, name="pipeline"):
+        self.name = name
+        self._source = source
+        self._stages = list(stages)
+        self._queues = [LatestQueue(maxsize) for _ in range(len(self._stages) + 1)]
+        self._stop = threading.Event()
+        self._source_done = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return not self._stop.is_set() and not self._source_done.is_set()
+
+    @property
+    def dropped(self):
+        """Fotogramas descartados en las colas porque alguna etapa se atrasó."""
+        return sum(q.dropped for q in self._queues)
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._source_loop, name=f"{self.name}-source", daemon=True)]
+        for i, (stage_name, fn) in enumerate(self._stages):
+            self._threads.append(threading.Thread(
+                target=self._stage_loop,
+                args=(stage_name, fn, self._queues[i], self._queues[i + 1]),
+                name=f"{self.name}-{stage_name}",
+                daemon=True,
+            ))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout=2.0)
+        self._threads = []
+
+    def get(self, timeout=1.0):
+        """Devuelve el siguiente paquete terminado o None si vence el timeout."""
+        try:
+            return self._queues[-1].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def run_once(self, measure=None):
+        """
+        Procesa un paquete de la fuente por todas las etapas en el hilo actual
+        (sin arrancar hilos). Útil para benchmarks; devuelve el paquete o None.
+        measure: fábrica de context managers measure(nombre_etapa) que envuelve cada etapa.
+        """
+        with measure("capture") if measure else nullcontext():
+            packet = self._source()
+        for stage_name, fn in self._stages:
+            if packet is None:
+                return None
+            with measure(stage_name) if measure else nullcontext():
+                packet = fn(packet)
+        return packet
+
+    def _source_loop(self):
+        first = self._queues[0]
+        try:
+            while not self._stop.is_set():
+                try:
+                    packet = self._source()
+                except StopIteration:
+                    break
+                except Exception as e:
+                    # Un fallo suelto de la fuente no debe dejar el pipeline sin fotogramas
+                    print(f"[ERROR en fuente de {self.name}]: {e}")
+                    self._stop.wait(0.1)
+                    continue
+                if packet is not None:
+                    first.put_latest(packet)
+        finally:
+            # Aunque el hilo muera, running pasa a False y el motor cierra a los visores
+            self._source_done.set()
+
+    def _stage_loop(self, stage_name, fn, inbox, outbox):
+        while not self._stop.is_set():
+            try:
+                packet = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                packet = fn(packet)
+            except Exception as e:
+                print(f"[ERROR en etapa {stage_name}]: {e}")
+                continue
+            if packet is not None:
+                outbox.put_latest(packet)
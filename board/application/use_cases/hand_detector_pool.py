@@ -0,0 +1,122 @@
+import threading
+
+from django.conf import settings
+
+
+class HandDetectorPool:
+    """
+    Detectores de MediaPipe Hands ya inicializados y listos para prestar.
+    Crear el grafo y las primeras inferencias cuesta más de un segundo (incluida
+    la importación de MediaPipe); con el pool ese costo se paga una vez, en
+    segundo plano, y no cada vez que se abre o recarga la pizarra.
+    """
+
+    def __init__(self, size=1, max_num_hands=1, min_detection_confidence=0.8,
+                 min_tracking_confidence=0.75, warm_shape=(480, 640, 3)):
+        self.size = max(1, int(size))
+        self.options = dict(
+            max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+        self.warm_shape = warm_shape
+        self._cond = threading.Condition()
+        self._idle = []
+        self._leased = 0
+        self._warming = False
+
+    def _create(self):
+        import mediapipe as mp
+        detector = mp.solutions.hands.Hands(**self.options)
+        self._warm_up(detector)
+        return detector
+
+    def _warm_up(self, detector):
+        # Primera inferencia: reserva buffers y carga los delegados de TFLite
+        import numpy as np
+        detector.process(np.zeros(self.warm_shape, np.uint8))
+
+    def warm(self, background=True):
+        """Crea los detectores que falten hasta completar el pool."""
+        if background:
+            threading.Thread(target=self.warm, args=(False,), name="hand-detector-warmup", daemon=True).start()
+            return
+        with self._cond:
+            if self._warming:
+                return
+            self._warming = True
+        try:
+            while True:
+                with self._cond:
+                    if len(self._idle) + self._leased >= self.size:
+                        break
+                detector = self._create()
+                with self._cond:
+                    self._idle.append(detector)
+                    self._cond.notify()
+            print(f"[INFO] {self.size} detector(es) de manos listos.")
+        except Exception as e:
+            print(f"[ERROR] No se pudieron precalentar los detectores de manos: {e}")
+        finally:
+            with self._cond:
+                self._warming = False
+                self._cond.notify_all()
+
+    def lease(self):
+        """Presta un detector listo; si el pool se está calentando, espera al primero."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._idle or not self._warming)
+            self._leased += 1
+            if self._idle:
+                return self._idle.pop()
+        try:
+            # Pool vacío (más streams que detectores): se crea uno extra
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._leased -= 1
+            raise
+
+    def release(self, detector):
+        """Devuelve un detector con el rastreo reiniciado (no arrastra la mano del stream anterior)."""
+        with self._cond:
+            self._leased -= 1
+            keep = len(self._idle) < self.size
+        if not keep:
+            detector.close()
+            return
+        try:
+            detector.reset()
+            self._warm_up(detector)
+        except Exception as e:
+            print(f"[ERROR] Detector de manos descartado: {e}")
+            detector.close()
+            return
+        with self._cond:
+            self._idle.append(detector)
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for detector in idle:
+            detector.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hand_detector_pool():
+    """Pool global configurado con settings.HAND_DETECTORS."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = getattr(settings, "HAND_DETECTORS", {})
+            _pool = HandDetectorPool(
+                size=config.get("POOL_SIZE", 1),
+                max_num_hands=config.get("MAX_NUM_HANDS", 1),
+                min_detection_confidence=config.get("MIN_DETECTION_CONFIDENCE", 0.8),
+                min_tracking_confidence=config.get("MIN_TRACKING_CONFIDENCE", 0.75),
+            )
+        return _pool
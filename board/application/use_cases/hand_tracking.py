@@ -0,0 +1,236 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+from board.application.use_cases.frame_pipeline import BufferRing
+
+
+# ---------------------- Observaciones de mano ----------------------
+
+class Landmark:
+    """Punto normalizado (0..1) compatible con los landmarks de MediaPipe."""
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+
+class HandObservation:
+    """
+    Mano detectada o estimada: 21 landmarks normalizados (21, 3) y su lateralidad.
+    Expone .landmark igual que MediaPipe para reutilizar get_finger_status y tool_action.
+    """
+
+    def __init__(self, points, handedness="Right", inferred=True):
+        self.points = np.asarray(points, dtype=np.float32).reshape(21, 3)
+        self.handedness = handedness
+        self.inferred = inferred   # False si los landmarks fueron extrapolados
+        self._landmark = None
+
+    @property
+    def landmark(self):
+        if self._landmark is None:
+            self._landmark = [Landmark(x, y, z) for x, y, z in self.points]
+        return self._landmark
+
+
+def from_mediapipe(results):
+    """Convierte el resultado de hands.process en una lista de HandObservation."""
+    if results is None or not results.multi_hand_landmarks:
+        return []
+    hands = []
+    for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
+        label = "Right"
+        if results.multi_handedness and idx < len(results.multi_handedness):
+            label = results.multi_handedness[idx].classification[0].label
+        points = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+        hands.append(HandObservation(points, label))
+    return hands
+
+
+# ---------------------- Frecuencia adaptativa ----------------------
+
+class AdaptiveHandTracker:
+    """
+    Ejecuta el detector como máximo cada N fotogramas y solo si hay movimiento
+    (o cada idle_interval fotogramas con la mano quieta), y rellena los huecos
+    extrapolando los 21 landmarks con la velocidad de las dos últimas inferencias.
+    N se ajusta al tiempo medido de inferencia frente al presupuesto por fotograma,
+    así el puntero sigue fluido a los FPS de la cámara.
+
+    detect: callable(frame_bgr) -> list[HandObservation]
+    mode: "adaptive" o "every_frame" (comportamiento original).
+    """
+
+    THUMB_SIZE = (32, 24)
+
+    def __init__(self, detect, mode="adaptive", target_fps=30, max_interval=4,
+                 idle_interval=8, motion_threshold=6.0, damping=0.8, buffer_pool=True):
+        self.detect = detect
+        self.mode = mode
+        self.frame_budget = 1.0 / max(1, target_fps)
+        self.max_interval = max(1, int(max_interval))
+        self.idle_interval = max(self.max_interval, int(idle_interval))
+        self.motion_threshold = motion_threshold
+        self.damping = damping
+
+        self.interval = 1
+        self.avg_inference = 0.0
+        self.frames_since = 0
+        self._thumb = None
+        self._history = []   # [(timestamp, hands)] de las dos últimas inferencias
+        self._gray = BufferRing(1) if buffer_pool else None
+
+    def process(self, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.mode == "every_frame":
+            return self._infer(frame, timestamp, None)
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY,
+                            dst=self._gray.next(frame.shape[:2]) if self._gray else None)
+        thumb = cv2.resize(gray, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        self.frames_since += 1
+        if self._should_infer(thumb):
+            return self._infer(frame, timestamp, thumb)
+        return self._extrapolate(timestamp)
+
+    def _should_infer(self, thumb):
+        if not self._history or self._thumb is None:
+            return True
+        # Nunca más seguido de lo que permite el costo medido de inferencia
+        if self.frames_since < self.interval:
+            return False
+        # Sin mano rastreada o refresco periódico aunque no haya movimiento
+        if not self._history[-1][1] or self.frames_since >= self.idle_interval:
+            return True
+        motion = float(cv2.absdiff(thumb, self._thumb).mean())
+        return motion > self.motion_threshold
+
+    def _infer(self, frame, timestamp, thumb):
+        start = time.perf_counter()
+        hands = self.detect(frame)
+        elapsed = time.perf_counter() - start
+
+        # Media móvil del costo de inferencia → intervalo entre inferencias
+        self.avg_inference = elapsed if not self.avg_inference else 0.8 * self.avg_inference + 0.2 * elapsed
+        self.interval = min(self.max_interval, max(1, math.ceil(self.avg_inference / self.frame_budget)))
+
+        self.frames_since = 0
+        self._thumb = thumb
+        self._history.append((timestamp, hands))
+        self._history = self._history[-2:]
+        return hands
+
+    def _extrapolate(self, timestamp):
+        t1, last = self._history[-1]
+        if len(self._history) < 2 or not last:
+            return last
+        t0, prev = self._history[0]
+        if len(prev) != len(last) or t1 <= t0:
+            return last
+
+        predicted = []
+        dt = (timestamp - t1) * self.damping
+        for p_hand, l_hand in zip(prev, last):
+            velocity = (l_hand.points - p_hand.points) / (t1 - t0)
+            points = l_hand.points + velocity * dt
+            points[:, :2] = np.clip(points[:, :2], 0.0, 1.0)
+            predicted.append(HandObservation(points, l_hand.handedness, inferred=False))
+        return predicted
+
+
+# ---------------------- Entrada reducida / recorte de la mano ----------------------
+
+class RoiHandDetector:
+    """
+    Front end de inferencia: entrega a MediaPipe una copia reducida del fotograma
+    o un recorte alrededor de la última mano, y devuelve los landmarks en
+    coordenadas normalizadas del fotograma completo. Si se pierde la mano en el
+    recorte, vuelve a detectar sobre el fotograma completo (reducido).
+
+    process: callable(rgb) -> resultados de hands.process
+    parse: convierte lo que devuelve process en una lista de HandObservation
+           (None si process ya las devuelve, p. ej. el servicio de inferencia).
+    """
+
+    def __init__(self, process, max_side=640, use_roi=True, roi_margin=0.5, roi_size=320,
+                 parse=from_mediapipe, buffer_pool=True):
+        self.process = process
+        self.parse = parse or (lambda hands: hands)
+        # Reducción y conversión a RGB sobre buffers fijos (process no conserva la imagen)
+        self._buffers = {name: BufferRing(1) for name in ("small", "rgb", "crop", "crop_rgb")} if buffer_pool else None
+        self.max_side = max_side
+        self.use_roi = use_roi
+        self.roi_margin = roi_margin
+        self.roi_size = roi_size
+        self.roi = None   # (x0, y0, x1, y1) en píxeles del fotograma completo
+
+    def __call__(self, frame):
+        h, w = frame.shape[:2]
+        if self.roi is not None:
+            hands = self._detect_roi(frame, w, h)
+            if hands:
+                self._update_roi(hands, w, h)
+                return hands
+            # Mano perdida en el recorte → detección completa
+            self.roi = None
+
+        hands = self._detect_full(frame, w, h)
+        if hands and self.use_roi:
+            self._update_roi(hands, w, h)
+        return hands
+
+    def _detect_full(self, frame, w, h):
+        scale = min(1.0, self.max_side / float(max(w, h)))
+        size = (int(w * scale), int(h * scale))
+        small = frame if scale >= 1.0 else cv2.resize(
+            frame, size, dst=self._buffer("small", (size[1], size[0], 3)), interpolation=cv2.INTER_AREA)
+        # Las coordenadas normalizadas no cambian con un escalado uniforme
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._buffer("rgb", small.shape))
+        return self.parse(self.process(rgb))
+
+    def _buffer(self, name, shape):
+        return self._buffers[name].next(shape) if self._buffers else None
+
+    def _detect_roi(self, frame, w, h):
+        x0, y0, x1, y1 = self.roi
+        shape = (self.roi_size, self.roi_size, 3)
+        crop = cv2.resize(frame[y0:y1, x0:x1], shape[:2], dst=self._buffer("crop", shape),
+                          interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self._buffer("crop_rgb", shape))
+        hands = self.parse(self.process(rgb))
+
+        # Recorte → coordenadas del fotograma completo
+        cw, ch = x1 - x0, y1 - y0
+        for hand in hands:
+            hand.points[:, 0] = (x0 + hand.points[:, 0] * cw) / w
+            hand.points[:, 1] = (y0 + hand.points[:, 1] * ch) / h
+            hand.points[:, 2] *= cw / float(w)
+        return hands
+
+    def _update_roi(self, hands, w, h):
+        pts = hands[0].points[:, :2] * (w, h)
+        min_x, min_y = pts.min(axis=0)
+        max_x, max_y = pts.max(axis=0)
+
+        # Histéresis: el recorte solo se mueve si la mano se acerca a su borde,
+        # así MediaPipe ve una imagen estable y conserva su propio rastreo
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset = 0.15 * (x1 - x0)
+            if (min_x > x0 + inset and min_y > y0 + inset and
+                    max_x < x1 - inset and max_y < y1 - inset and
+                    max(max_x - min_x, max_y - min_y) > 0.3 * (x1 - x0)):
+                return
+
+        side = max(max_x - min_x, max_y - min_y) * (1 + 2 * self.roi_margin)
+        side = int(min(max(side, 0.2 * min(w, h)), min(w, h)))
+        cx, cy = (min_x + max_x) / 2, (min_y + max_y) / 2
+        x0 = int(np.clip(cx - side / 2, 0, w - side))
+        y0 = int(np.clip(cy - side / 2, 0, h - side))
+        self.roi = (x0, y0, x0 + side, y0 + side)
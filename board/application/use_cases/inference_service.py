@@ -0,0 +1,275 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+
+from board.application.use_cases.hand_tracking import HandObservation, from_mediapipe
+from board.application.use_cases.shared_frames import SharedFrameRing
+
+
+# ---------------------- Proceso de inferencia ----------------------
+
+def _worker_main(requests, responses, options):
+    """
+    Bucle de un proceso de inferencia: un detector de MediaPipe por sesión
+    (cada pizarra conserva su propio rastreo) y detectores libres reciclados.
+    Mensajes: ("process", session, request_id, frame_ref), ("close", session) y None para salir.
+    frame_ref = (nombre, ranuras, bytes por ranura, ranura, seq) del SharedFrameRing
+    de la sesión: la imagen se lee en memoria compartida, no viaja por la cola.
+    """
+    import mediapipe as mp
+    import numpy as np
+
+    def create():
+        detector = mp.solutions.hands.Hands(**options)
+        detector.process(np.zeros((480, 640, 3), np.uint8))
+        return detector
+
+    idle = [create()]
+    sessions = {}
+    rings = {}
+    responses.put(("ready", None, None))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        if message[0] == "close":
+            detector = sessions.pop(message[1], None)
+            if detector is not None:
+                detector.reset()
+                idle.append(detector)
+            ring = rings.pop(message[1], None)
+            if ring is not None:
+                ring.close()
+            continue
+
+        _, session, request_id, (name, slots, slot_bytes, slot, seq) = message
+        try:
+            ring = rings.get(session)
+            if ring is None or ring.name != name:
+                if ring is not None:
+                    ring.close()
+                ring = rings[session] = SharedFrameRing.attach(name, slots, slot_bytes)
+            rgb = ring.read(slot, seq)
+            if rgb is None:
+                raise RuntimeError("fotograma reemplazado antes de la inferencia")
+
+            detector = sessions.get(session)
+            if detector is None:
+                detector = sessions[session] = idle.pop() if idle else create()
+            hands = [(hand.points, hand.handedness) for hand in from_mediapipe(detector.process(rgb))]
+            responses.put(("result", request_id, hands))
+        except Exception as e:
+            responses.put(("error", request_id, str(e)))
+
+    for detector in list(sessions.values()) + idle:
+        detector.close()
+    for ring in rings.values():
+        ring.close()
+
+
+# ---------------------- Servicio en el proceso web ----------------------
+
+class InferenceSession:
+    """
+    Canal de una pizarra hacia su proceso de inferencia (siempre el mismo,
+    para que MediaPipe mantenga el rastreo entre fotogramas).
+    process(rgb) devuelve la lista de HandObservation. La imagen se escribe en un
+    SharedFrameRing propio de la sesión y al proceso solo le llega la referencia.
+    """
+
+    MIN_SLOT_BYTES = 640 * 480 * 3
+
+    def __init__(self, service, worker, session_id, timeout):
+        self.service = service
+        self.worker = worker
+        self.session_id = session_id
+        self.timeout = timeout
+        self.ring = None
+
+    def process(self, rgb):
+        if self.ring is None or not self.ring.fits(rgb.shape):
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = SharedFrameRing(slots=2, slot_bytes=max(rgb.nbytes, self.MIN_SLOT_BYTES))
+        seq = self.ring.write(rgb)
+        frame_ref = (self.ring.name, self.ring.slots, self.ring.slot_bytes, seq % self.ring.slots, seq)
+
+        future = self.service._submit(self.worker, self.session_id, frame_ref)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            print(f"[ERROR] Inferencia sin respuesta del proceso {self.worker}.")
+            return []
+        except RuntimeError as e:
+            print(f"[ERROR en inferencia]: {e}")
+            return []
+
+    def close(self):
+        self.service._close_session(self)
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class HandInferenceService:
+    """
+    N procesos con MediaPipe que reciben fotogramas (RGB) y devuelven landmarks
+    y lateralidad. Las pizarras envían su inferencia aquí, así varias pizarras
+    aprovechan varios núcleos y una inferencia lenta no compite por el GIL con
+    las peticiones HTTP. Cada sesión queda fija en el proceso con menos pizarras.
+    """
+
+    def __init__(self, workers=2, timeout=2.0, **options):
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.options = options
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._processes = []
+        self._requests = []
+        self._responses = None
+        self._pending = {}             # request_id → Future
+        self._load = []                # sesiones abiertas por proceso
+        self._ids = itertools.count(1)
+        self._dispatcher = None
+        self._ready = threading.Event()
+
+    @property
+    def running(self):
+        return bool(self._processes)
+
+    def start(self):
+        """Lanza los procesos (idempotente); no espera a que terminen de calentar."""
+        with self._lock:
+            if self._processes:
+                return self
+            self._responses = self._context.Queue()
+            for i in range(self.workers):
+                self._processes.append(None)
+                self._requests.append(None)
+                self._load.append(0)
+                self._spawn(i)
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="hand-inference-results", daemon=True)
+            self._dispatcher.start()
+        print(f"[INFO] Servicio de inferencia iniciado con {self.workers} proceso(s).")
+        return self
+
+    def _spawn(self, worker):
+        requests = self._context.Queue(maxsize=4)
+        process = self._context.Process(
+            target=_worker_main, args=(requests, self._responses, self.options),
+            name=f"hand-inference-{worker}", daemon=True,
+        )
+        process.start()
+        self._processes[worker] = process
+        self._requests[worker] = requests
+
+    def stop(self):
+        with self._lock:
+            processes, self._processes = self._processes, []
+            requests, self._requests = self._requests, []
+            self._load = []
+        for q in requests:
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                pass
+        for process in processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        if self._responses is not None:
+            self._responses.put(("stop", None, None))
+        self._fail_pending("Servicio de inferencia detenido.")
+
+    def wait_ready(self, timeout=None):
+        """Espera a que al menos un proceso tenga su detector listo."""
+        return self._ready.wait(timeout)
+
+    def open_session(self):
+        with self._lock:
+            if not self._processes:
+                raise RuntimeError("El servicio de inferencia no está iniciado.")
+            worker = min(range(len(self._load)), key=self._load.__getitem__)
+            self._load[worker] += 1
+        return InferenceSession(self, worker, next(self._ids), self.timeout)
+
+    def _close_session(self, session):
+        with self._lock:
+            if session.worker >= len(self._requests):
+                return
+            self._load[session.worker] -= 1
+            requests = self._requests[session.worker]
+        try:
+            requests.put(("close", session.session_id), timeout=self.timeout)
+        except queue.Full:
+            pass
+
+    def _submit(self, worker, session_id, frame_ref):
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if worker >= len(self._requests):
+                future.set_exception(RuntimeError("Servicio de inferencia detenido."))
+                return future
+            if not self._processes[worker].is_alive():
+                # El proceso murió: se relanza (la pizarra pierde solo el rastreo actual)
+                print(f"[ERROR] Proceso de inferencia {worker} caído, reiniciando.")
+                self._spawn(worker)
+            requests = self._requests[worker]
+            self._pending[request_id] = future
+        try:
+            requests.put(("process", session_id, request_id, frame_ref), timeout=self.timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(RuntimeError(f"Proceso de inferencia {worker} saturado."))
+        return future
+
+    def _dispatch_loop(self):
+        responses = self._responses
+        while True:
+            kind, request_id, payload = responses.get()
+            if kind == "stop":
+                break
+            if kind == "ready":
+                self._ready.set()
+                continue
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue   # la sesión ya dejó de esperar (timeout)
+            if kind == "result":
+                future.set_result([HandObservation(points, label) for points, label in payload])
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _fail_pending(self, message):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(message))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_inference_service():
+    """Servicio global configurado con settings.HAND_DETECTORS (se inicia al pedirlo)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            config = getattr(settings, "HAND_DETECTORS", {})
+            _service = HandInferenceService(
+                workers=config.get("WORKERS", 2),
+                max_num_hands=config.get("MAX_NUM_HANDS", 1),
+                min_detection_confidence=config.get("MIN_DETECTION_CONFIDENCE", 0.8),
+                min_tracking_confidence=config.get("MIN_TRACKING_CONFIDENCE", 0.75),
+            )
+        return _service.start()
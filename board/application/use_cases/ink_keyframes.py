@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from board.infrastructure.opencv.stroke_renderer import draw_strokes
+
+
+class InkKeyframes:
+    """
+    Copias de la capa de tinta (color + cobertura) cada `interval` trazos (keyframes), para deshacer
+    sin volver a dibujar todo el dibujo: se restaura el keyframe más cercano y se
+    repiten como mucho interval - 1 trazos. Las copias ocupan como máximo
+    budget_bytes; al pasarse se descarta la más antigua.
+    """
+
+    def __init__(self, interval=20, budget_bytes=64 * 1024 * 1024):
+        self.interval = max(1, int(interval))
+        self.budget_bytes = budget_bytes
+        self._frames = OrderedDict()   # cantidad de trazos → (tinta, cobertura), en orden creciente
+        self._bytes = 0
+
+    def clear(self):
+        self._frames.clear()
+        self._bytes = 0
+
+    def capacity(self, frame_bytes):
+        """Cuántos keyframes de frame_bytes caben en el presupuesto (al menos uno)."""
+        return max(1, self.budget_bytes // max(1, frame_bytes))
+
+    def record(self, count, ink, coverage):
+        """Guarda la capa si count (trazos dibujados en ink) cae en un múltiplo del intervalo."""
+        if count == 0 or count % self.interval or count in self._frames:
+            return
+        if self._frames and next(reversed(self._frames)) > count:
+            self.discard_after(count)
+        self._frames[count] = (ink.copy(), coverage.copy())
+        self._bytes += ink.nbytes + coverage.nbytes
+        while self._bytes > self.budget_bytes and len(self._frames) > 1:
+            _, (ink, coverage) = self._frames.popitem(last=False)
+            self._bytes -= ink.nbytes + coverage.nbytes
+
+    def discard_after(self, count):
+        """Olvida los keyframes de más de count trazos (dejan de coincidir con el dibujo)."""
+        while self._frames and next(reversed(self._frames)) > count:
+            _, (ink, coverage) = self._frames.popitem()
+            self._bytes -= ink.nbytes + coverage.nbytes
+
+    def _base(self, count):
+        return max((key for key in self._frames if key <= count), default=0)
+
+    def replay_cost(self, count):
+        """Trazos que habría que volver a dibujar para restaurar count trazos."""
+        return count - self._base(count)
+
+    def restore(self, ink, coverage, strokes, count):
+        """
+        Deja en ink/coverage los primeros count trazos: copia el keyframe más cercano
+        y dibuja los que faltan. Devuelve cuántos trazos se volvieron a dibujar.
+        """
+        base = self._base(count)
+        if base and self._frames[base][0].shape == ink.shape:
+            np.copyto(ink, self._frames[base][0])
+            np.copyto(coverage, self._frames[base][1])
+        else:
+            base = 0
+            ink[:] = 255
+            coverage[:] = 0
+        draw_strokes(ink, strokes[base:count], coverage)
+        return count - base
@@ -0,0 +1,75 @@
+import numpy as np
+
+from board.infrastructure.opencv.stroke_renderer import draw_strokes
+
+
+class InkTiles:
+    """
+    Divide la capa de tinta en tiles del tamaño de las celdas del índice espacial de
+    trazos: los trazos que tocan un tile son los registrados en su celda. Al quitar o
+    cambiar trazos solo se vuelven a dibujar los tiles afectados, con esos trazos.
+    Los trazos se dibujan en una capa auxiliar del tamaño completo y se copian solo los
+    tiles sucios: así OpenCV recorta igual que al dibujar todo y el resultado es idéntico.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.size = index.cell_size
+        self.shape = None
+        self._scratch = None  # (tinta, cobertura) auxiliares
+
+    @property
+    def rows(self):
+        return -(-self.shape[0] // self.size)
+
+    @property
+    def cols(self):
+        return -(-self.shape[1] // self.size)
+
+    def reset(self, h, w):
+        self.shape = (h, w)
+        if self._scratch is not None and self._scratch[1].shape != (h, w):
+            self._scratch = None
+
+    def touched(self, points, thickness):
+        """Tiles de la pizarra que cubren los segmentos de points con el grosor dado."""
+        if self.shape is None:
+            return set()
+        rows, cols = self.rows, self.cols
+        return {(ty, tx) for ty, tx in self.index.cells_for(points, thickness)
+                if 0 <= ty < rows and 0 <= tx < cols}
+
+    def strokes_in(self, tiles):
+        """Trazos que tocan alguno de los tiles, en orden de dibujo."""
+        return self.index.strokes_in_cells(tiles)
+
+    # ---------------------- Regiones y redibujado ----------------------
+    def regions(self, tiles):
+        """Slices (filas, columnas) de los tiles, uniendo los contiguos de una misma fila."""
+        h, w = self.shape
+        s = self.size
+        for ty in sorted({ty for ty, _ in tiles}):
+            row = sorted(tx for y, tx in tiles if y == ty)
+            start = prev = row[0]
+            for tx in row[1:] + [None]:
+                if tx is not None and tx == prev + 1:
+                    prev = tx
+                    continue
+                yield slice(ty * s, min(h, (ty + 1) * s)), slice(start * s, min(w, (prev + 1) * s))
+                start = prev = tx
+
+    def redraw(self, ink, coverage, tiles, strokes):
+        """Vuelve a dibujar la tinta de los tiles; strokes: los que los tocan (strokes_in), en orden."""
+        if not tiles:
+            return
+        if self._scratch is None:
+            self._scratch = (np.empty_like(ink), np.empty_like(coverage))
+        scratch_ink, scratch_coverage = self._scratch
+        regions = list(self.regions(tiles))
+        for region in regions:
+            scratch_ink[region] = 255
+            scratch_coverage[region] = 0
+        draw_strokes(scratch_ink, strokes, scratch_coverage)
+        for region in regions:
+            ink[region] = scratch_ink[region]
+            coverage[region] = scratch_coverage[region]
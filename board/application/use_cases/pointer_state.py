@@ -1,3 +1,5 @@
+from board.application.use_cases import board_events
+
 pointer_data = {
     "x": 0,
     "y": 0,
@@ -5,4 +7,25 @@ pointer_data = {
     "action": None,
     "redirect": False,
     "url": None
-}
\ No newline at end of file
+}
+
+
+def update_pointer(**fields):
+    """
+    Actualiza pointer_data y publica el estado completo solo si algo cambió.
+    Un cambio de acción se publica además como evento "action": el estado del
+    puntero se puede resumir en el último, pero una acción ("save_requested") no.
+    """
+    changed = {key: value for key, value in fields.items() if pointer_data.get(key) != value}
+    if not changed:
+        return
+    pointer_data.update(changed)
+    if "action" in changed:
+        board_events.publish("action", action=pointer_data["action"])
+    board_events.publish("pointer", **pointer_data)
+
+
+def push_alert(message):
+    """Envía un aviso para mostrar en el navegador."""
+    pointer_data["alert"] = message
+    board_events.publish("alert", message=message)
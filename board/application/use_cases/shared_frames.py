@@ -0,0 +1,99 @@
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+class SharedFrameRing:
+    """
+    Buffer circular de fotogramas en memoria compartida (multiprocessing.shared_memory).
+    Cada ranura guarda un número de secuencia y la forma de la imagen en una cabecera;
+    el escritor invalida la ranura (secuencia 0) antes de escribirla y la publica al
+    terminar. Los lectores obtienen una vista sin copiar y, si la usan después de
+    leerla, confirman con is_current() que el escritor no la reemplazó (seqlock).
+    Otro proceso puede abrir el mismo buffer con attach(name, slots, slot_bytes).
+    """
+
+    HEADER_FIELDS = 4   # secuencia, alto, ancho, canales (0 = imagen en escala de grises)
+
+    def __init__(self, slots=3, slot_bytes=640 * 480 * 3, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        header_bytes = slots * self.HEADER_FIELDS * 8
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * slot_bytes)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if multiprocessing.parent_process() is None:
+                # Proceso independiente: su resource tracker borraría el segmento al
+                # terminar. Los hijos de multiprocessing comparten el del creador.
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._header = np.ndarray((slots, self.HEADER_FIELDS), np.int64, buffer=self._shm.buf)
+        self._data = np.ndarray((slots, slot_bytes), np.uint8, buffer=self._shm.buf, offset=header_bytes)
+        if self.owner:
+            self._header[:] = 0
+        self.seq = 0
+
+    @classmethod
+    def for_shape(cls, shape, slots=3):
+        return cls(slots, int(np.prod(shape)))
+
+    @classmethod
+    def attach(cls, name, slots, slot_bytes):
+        return cls(slots, slot_bytes, name=name)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def fits(self, shape):
+        return int(np.prod(shape)) <= self.slot_bytes
+
+    def _view(self, slot):
+        h, w, c = self._header[slot, 1:]
+        shape = (h, w, c) if c else (h, w)
+        return self._data[slot, :h * w * max(c, 1)].reshape(shape)
+
+    # ---------------------- Escritura ----------------------
+
+    def begin_write(self, shape):
+        """Reserva la siguiente ranura para una imagen uint8 de la forma dada → (slot, vista destino)."""
+        self.seq += 1
+        slot = self.seq % self.slots
+        self._header[slot, 0] = 0
+        h, w = shape[:2]
+        self._header[slot, 1:] = (h, w, shape[2] if len(shape) > 2 else 0)
+        return slot, self._view(slot)
+
+    def commit(self, slot):
+        """Publica la ranura escrita con su número de secuencia."""
+        self._header[slot, 0] = self.seq
+        return self.seq
+
+    def write(self, frame):
+        slot, dst = self.begin_write(frame.shape)
+        np.copyto(dst, frame)
+        return self.commit(slot)
+
+    # ---------------------- Lectura ----------------------
+
+    def read(self, slot, seq):
+        """Vista de la ranura si todavía contiene el fotograma seq (o None)."""
+        if self._header[slot, 0] != seq:
+            return None
+        return self._view(slot)
+
+    def is_current(self, slot, seq):
+        return int(self._header[slot, 0]) == seq
+
+    def close(self):
+        # Soltar las vistas antes de cerrar el segmento
+        self._header = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Algún lector conserva una vista: el mapeo se libera cuando la suelte
+            pass
+        if self.owner:
+            self._shm.unlink()
@@ -0,0 +1,133 @@
+import asyncio
+import queue
+import threading
+
+from board.application.use_cases.frame_pipeline import LatestQueue
+
+
+class Subscription:
+    """
+    Suscriptor de un FrameBroadcaster con su propia cola acotada.
+    Si el cliente es lento se descartan sus fotogramas viejos, nunca se acumulan.
+    """
+
+    def __init__(self, broadcaster, maxsize=2):
+        self.broadcaster = broadcaster
+        self.queue = LatestQueue(maxsize)
+        self.closed = False
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def put(self, item):
+        self.queue.put_latest(item)
+
+    def get(self, timeout=1.0):
+        """Siguiente elemento o None si vence el timeout o el broadcaster terminó."""
+        if self.closed and self.queue.empty():
+            return None
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncSubscription:
+    """
+    Suscriptor para vistas async (ASGI): la cola vive en el event loop del visor
+    y el hilo del motor le entrega los fotogramas con call_soon_threadsafe,
+    así un stream abierto no ocupa ningún hilo mientras espera.
+    """
+
+    def __init__(self, broadcaster, loop, maxsize=2):
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+        self.dropped = 0
+
+    def _put_latest(self, item):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def put(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self._put_latest, item)
+        except RuntimeError:
+            # El event loop ya se cerró
+            self.closed = True
+
+    async def get(self, timeout=1.0):
+        """Siguiente elemento o None si vence el timeout o el broadcaster terminó."""
+        if self.closed and self.queue.empty():
+            return None
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.closed = True
+
+
+class FrameBroadcaster:
+    """
+    Reparte cada fotograma codificado una sola vez a todos los suscriptores.
+    Guarda el último para entregarlo de inmediato a quien se suscribe después,
+    ya que con la pizarra quieta pueden pasar segundos sin fotogramas nuevos.
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last = None
+
+    @property
+    def count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, loop=None):
+        """Nuevo suscriptor; con un event loop devuelve un AsyncSubscription."""
+        if loop is not None:
+            subscription = AsyncSubscription(self, loop, self.maxsize)
+        else:
+            subscription = Subscription(self, self.maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._last is not None:
+                subscription.put(self._last)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+            return len(self._subscribers)
+
+    def publish(self, item):
+        with self._lock:
+            self._last = item
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(item)
+
+    def forget_last(self):
+        """Descarta el último fotograma (p. ej. se cargó otro dibujo)."""
+        with self._lock:
+            self._last = None
+
+    def close_all(self):
+        """Marca a todos los suscriptores como terminados (p. ej. la cámara se detuvo)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in subscribers:
+            subscription.close()
@@ -0,0 +1,94 @@
+import numpy as np
+
+from board.infrastructure.opencv.stroke_renderer import flat_points
+
+
+# Decimales de las coordenadas relativas: al volver a píxeles el error es < 0.05 px hasta 10000 px de lado
+PRECISION = 5
+# Resoluciones de cámara con las que se pudo haber dibujado un dibujo antiguo
+LEGACY_CAMERA_SIZES = [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def _split(points, counts):
+    """Lista de puntos de todos los trazos → una lista por trazo (un solo tolist para todo)."""
+    points = points.tolist()
+    ends = np.cumsum(counts).tolist()
+    return [points[end - count:end] for end, count in zip(ends, counts.tolist())]
+
+
+def normalize_strokes(strokes, width, height):
+    """
+    Trazos en píxeles de un lienzo width x height → formato guardado: puntos relativos
+    (0-1) al ancho y alto, y grosor relativo al alto. Devuelve trazos nuevos.
+    """
+    strokes = list(strokes)
+    xy, counts = flat_points(strokes)
+    points = _split(np.round(xy / (width, height), PRECISION), counts)
+    return [
+        dict(stroke, points=stroke_points, thickness=round(float(stroke["thickness"]) / height, PRECISION))
+        for stroke, stroke_points in zip(strokes, points)
+    ]
+
+
+def scale_strokes(strokes, scale):
+    """Trazos con los puntos multiplicados por scale = (sx, sy) y llevados a píxeles enteros."""
+    strokes = list(strokes)
+    xy, counts = flat_points(strokes)
+    points = _split(np.rint(xy * scale).astype(np.int64), counts)
+    return [
+        dict(stroke, points=stroke_points, thickness=max(1, int(round(float(stroke["thickness"]) * scale[1]))))
+        for stroke, stroke_points in zip(strokes, points)
+    ]
+
+
+def legacy_size(strokes, width, height):
+    """
+    Lienzo de un dibujo guardado en píxeles absolutos (antes de normalizar). Se guardaban
+    con 640x480 declarados aunque la cámara fuera más grande: si algún punto queda fuera,
+    se toma la primera resolución de cámara habitual que los contiene (o su extensión).
+    """
+    xy, _ = flat_points(list(strokes))
+    if not len(xy):
+        return width, height
+    x1, y1 = xy.max(axis=0).tolist()
+    if x1 < width and y1 < height:
+        return width, height
+    for size in LEGACY_CAMERA_SIZES:
+        if x1 < size[0] and y1 < size[1]:
+            return size
+    return int(x1) + 1, int(y1) + 1
+
+
+def source_size(drawing):
+    """Tamaño (ancho, alto) del lienzo en el que se dibujó el dibujo guardado."""
+    if drawing.normalized:
+        return drawing.width, drawing.height
+    return legacy_size(drawing.strokes or [], drawing.width, drawing.height)
+
+
+def drawing_scale(drawing, width, height):
+    """
+    (sx, sy) que lleva las coordenadas guardadas del dibujo a un lienzo width x height.
+    La escala es uniforme (sin deformar): si las proporciones no coinciden, el dibujo
+    queda ajustado desde la esquina superior izquierda, como en la cámara.
+    """
+    source_width, source_height = source_size(drawing)
+    fit = min(width / source_width, height / source_height)
+    if drawing.normalized:
+        return source_width * fit, source_height * fit
+    return fit, fit
+
+
+def fit_size(drawing, width=None, height=None):
+    """Tamaño de salida con las proporciones del dibujo: se indica el ancho, el alto o ninguno (original)."""
+    source_width, source_height = source_size(drawing)
+    if width:
+        return int(width), max(1, round(width * source_height / source_width))
+    if height:
+        return max(1, round(height * source_width / source_height)), int(height)
+    return source_width, source_height
+
+
+def drawing_strokes(drawing, width, height):
+    """Trazos del dibujo guardado en píxeles enteros de un lienzo width x height (para editarlos en vivo)."""
+    return scale_strokes(drawing.strokes or [], drawing_scale(drawing, width, height))
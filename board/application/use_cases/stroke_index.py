@@ -0,0 +1,141 @@
+import itertools
+
+import numpy as np
+
+from board.infrastructure.opencv.stroke_renderer import stroke_points
+
+
+class StrokeIndex:
+    """
+    Índice espacial de los trazos: rejilla uniforme de celdas de cell_size píxeles.
+    Cada trazo se registra en las celdas que cubren sus segmentos (con su grosor),
+    así las preguntas "qué hay en esta región" o "qué hay bajo el puntero" revisan
+    solo los trazos cercanos y no todos los puntos del dibujo.
+    Cada trazo lleva una clave de orden (tupla) para devolver los resultados en el
+    orden de dibujo; los trozos de un trazo partido heredan la clave del original.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = max(8, int(cell_size))
+        self.clear()
+
+    def clear(self):
+        self._cells = {}        # (fila, columna) → {id(trazo): trazo}
+        self._cells_of = {}     # id(trazo) → celdas que ocupa
+        self._order = {}        # id(trazo) → clave de orden
+        self._counter = itertools.count()
+
+    def rebuild(self, strokes):
+        self.clear()
+        for stroke in strokes:
+            self.add(stroke)
+
+    def __len__(self):
+        return len(self._cells_of)
+
+    def __contains__(self, stroke):
+        return id(stroke) in self._cells_of
+
+    # ---------------------- Actualización ----------------------
+
+    def cells_for(self, points, thickness):
+        """Celdas (fila, columna) que cubren los segmentos de points con el grosor dado."""
+        xy = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        if not len(xy):
+            return set()
+        a, b = (xy, xy) if len(xy) == 1 else (xy[:-1], xy[1:])
+        pad = int(thickness) // 2 + 2
+        low = (np.minimum(a, b) - pad) // self.cell_size
+        high = (np.maximum(a, b) + pad) // self.cell_size
+        cells = set()
+        # Segmentos cortos: casi todos caen en el mismo rango de celdas que el anterior
+        for x0, y0, x1, y1 in set(map(tuple, np.hstack([low, high]).tolist())):
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    cells.add((cy, cx))
+        return cells
+
+    def add(self, stroke, order=None):
+        """Registra el trazo; sin order queda encima de todos los demás."""
+        key = id(stroke)
+        if key in self._cells_of:
+            self.remove(stroke)
+        cells = self.cells_for(stroke_points(stroke), stroke["thickness"])
+        self._cells_of[key] = cells
+        self._order[key] = order if order is not None else (next(self._counter),)
+        for cell in cells:
+            self._cells.setdefault(cell, {})[key] = stroke
+        return cells
+
+    def remove(self, stroke):
+        """Quita el trazo y devuelve las celdas que ocupaba."""
+        key = id(stroke)
+        cells = self._cells_of.pop(key, set())
+        self._order.pop(key, None)
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._cells[cell]
+        return cells
+
+    def replace(self, stroke, pieces):
+        """Cambia un trazo por sus trozos, que ocupan su lugar en el orden de dibujo."""
+        order = self._order.get(id(stroke))
+        cells = self.remove(stroke)
+        for i, piece in enumerate(pieces):
+            cells |= self.add(piece, order + (i,) if order is not None else None)
+        return cells
+
+    def order_of(self, stroke):
+        return self._order.get(id(stroke))
+
+    # ---------------------- Consultas ----------------------
+
+    def strokes_in_cells(self, cells):
+        """Trazos registrados en alguna de las celdas, en orden de dibujo."""
+        found = {}
+        for cell in cells:
+            found.update(self._cells.get(cell, ()))
+        return sorted(found.values(), key=lambda stroke: self._order[id(stroke)])
+
+    def cells_in_rect(self, x0, y0, x1, y1):
+        s = self.cell_size
+        return {(cy, cx) for cy in range(y0 // s, y1 // s + 1) for cx in range(x0 // s, x1 // s + 1)}
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Trazos con algún segmento (más su grosor) dentro del rectángulo, en orden de dibujo."""
+        x0, x1 = sorted((int(x0), int(x1)))
+        y0, y1 = sorted((int(y0), int(y1)))
+        result = []
+        for stroke in self.strokes_in_cells(self.cells_in_rect(x0, y0, x1, y1)):
+            xy = stroke_points(stroke)
+            a, b = (xy, xy) if len(xy) == 1 else (xy[:-1], xy[1:])
+            pad = int(stroke["thickness"]) // 2 + 1
+            low, high = np.minimum(a, b) - pad, np.maximum(a, b) + pad
+            if np.any((low[:, 0] <= x1) & (high[:, 0] >= x0) & (low[:, 1] <= y1) & (high[:, 1] >= y0)):
+                result.append(stroke)
+        return result
+
+    def hit_test(self, x, y, radius=0):
+        """Trazos que pasan a menos de radius del punto (contando su grosor), el de encima primero."""
+        r = int(radius)
+        hits = []
+        for stroke in self.strokes_in_cells(self.cells_in_rect(x - r, y - r, x + r, y + r)):
+            reach = radius + int(stroke["thickness"]) / 2.0
+            if segment_distances(stroke_points(stroke), (x, y)).min() <= reach:
+                hits.append(stroke)
+        return hits[::-1]
+
+
+def segment_distances(xy, point):
+    """Distancia de point a cada segmento de la polilínea xy (N, 2); un solo punto cuenta como segmento."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    p = np.asarray(point, dtype=np.float64)
+    a, b = (xy, xy) if len(xy) == 1 else (xy[:-1], xy[1:])
+    ab = b - a
+    length2 = np.einsum("ij,ij->i", ab, ab)
+    t = np.clip(np.einsum("ij,ij->i", p - a, ab) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    closest = a + ab * t[:, None]
+    return np.hypot(*(closest - p).T)
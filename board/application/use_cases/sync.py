@@ -1,2 +1,68 @@
-from threading import Lock
+import asyncio
+from threading import Condition, Lock
 lock = Lock()
+
+
+class FrameBoard:
+    """
+    Último fotograma publicado por generate_frames, con contador de versión.
+    Los consumidores esperan en la variable de condición en vez de sondear;
+    los consumidores async esperan un asyncio.Event sin ocupar hilos.
+    """
+
+    def __init__(self):
+        self._cond = Condition(Lock())
+        self._async_waiters = set()
+        self.version = 0
+        self.frame = None
+
+    def publish(self, frame):
+        with self._cond:
+            self.frame = frame
+            self.version += 1
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+
+    def wait(self, after_version=0, timeout=1.0):
+        """Espera un fotograma con versión mayor a after_version → (version, frame) o None."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > after_version, timeout=timeout)
+            if self.version > after_version:
+                return self.version, self.frame
+            return None
+
+    async def wait_async(self, after_version=0, timeout=1.0):
+        """Versión async de wait() para vistas ASGI."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self.version > after_version:
+                return self.version, self.frame
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        with self._cond:
+            if self.version > after_version:
+                return self.version, self.frame
+            return None
+
+
+_camera_frames = {}
+
+
+def get_camera_frames(device=0):
+    """Fotogramas publicados por el motor de la cámara indicada (vista lateral)."""
+    with lock:
+        board = _camera_frames.get(device)
+        if board is None:
+            board = _camera_frames[device] = FrameBoard()
+        return board
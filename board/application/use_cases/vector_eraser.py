@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def distance_to_path(points, path):
+    """Distancia de cada punto (K, 2) a la polilínea path (M, 2)."""
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    a, b = (path, path) if len(path) == 1 else (path[:-1], path[1:])
+    ab = b - a
+    length2 = np.einsum("ij,ij->i", ab, ab)
+    length2[length2 == 0] = 1.0
+    ap = points[:, None, :] - a[None, :, :]
+    t = np.clip(np.einsum("kmj,mj->km", ap, ab) / length2, 0.0, 1.0)
+    return np.hypot(*np.moveaxis(ap - ab * t[..., None], -1, 0)).min(axis=1)
+
+
+def split_stroke(stroke, path, radius):
+    """
+    Corta el trazo donde lo toca el borrador (recorrido path de radio radius).
+    Devuelve None si no lo toca, o la lista de trozos que quedan (vacía si se borró entero).
+    Los tramos que el borrador no toca conservan sus puntos originales; en los cortes
+    se agrega solo el punto donde termina o empieza cada trozo.
+    """
+    xy = np.asarray(stroke["points"], dtype=np.float64).reshape(-1, 2)
+    if not len(xy):
+        return None
+    reach = radius + int(stroke["thickness"]) / 2.0
+    a, b = (xy, xy) if len(xy) == 1 else (xy[:-1], xy[1:])
+
+    # Muestras a lo largo de cada segmento, separadas como mucho medio alcance
+    step = max(1.0, reach / 2.0)
+    counts = np.maximum(1, np.ceil(np.hypot(*(b - a).T) / step).astype(int))
+    starts = np.concatenate([[0], np.cumsum(counts + 1)[:-1]])
+    segment = np.repeat(np.arange(len(a)), counts + 1)
+    t = (np.arange(len(segment)) - starts[segment]) / counts[segment]
+    samples = a[segment] + (b - a)[segment] * t[:, None]
+    erased = distance_to_path(samples, path) <= reach
+    if not erased.any():
+        return None
+
+    pieces, current = [], []
+
+    def add(point):
+        point = [int(round(point[0])), int(round(point[1]))]
+        if not current or current[-1] != point:
+            current.append(point)
+
+    def close():
+        if len(current) >= 2:
+            pieces.append(list(current))
+        current.clear()
+
+    for i in range(len(a)):
+        flags = erased[starts[i]:starts[i] + counts[i] + 1]
+        if not flags.any():
+            add(a[i])
+            add(b[i])
+            continue
+        points = samples[starts[i]:starts[i] + counts[i] + 1]
+        j = 0
+        while j < len(flags):
+            if flags[j]:
+                close()
+                j += 1
+                continue
+            # Tramo recto conservado: bastan sus extremos
+            end = j
+            while end + 1 < len(flags) and not flags[end + 1]:
+                end += 1
+            add(points[j])
+            add(points[end])
+            j = end + 1
+    close()
+    return [dict(stroke, points=piece) for piece in pieces]
@@ -1,8 +1,11 @@
+import asyncio
+import threading
+import time
+
 import cv2
-import mediapipe as mp
 import numpy as np
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from django.conf import settings
 
 from board.application.actions import (
     color_action,
@@ -12,29 +15,32 @@ from board.application.actions import (
     shape_action,
 )
 
-from board.application.use_cases.pointer_state import pointer_data
-from board.infrastructure.opencv.draw_utils import draw_grid_background, draw_toolbar
-from board.application.use_cases.sync import lock
-from board.infrastructure.opencv.video_capture_manager import cap
+from board.application.use_cases import board_events
+from board.application.use_cases.pointer_state import push_alert, update_pointer
+from board.infrastructure.opencv.draw_utils import draw_toolbar, grid_background
+from board.infrastructure.opencv.stroke_renderer import draw_strokes
+from board.application.use_cases.sync import get_camera_frames
+from board.application.use_cases.frame_pipeline import BufferRing, FramePacket, FramePipeline
+from board.application.use_cases.hand_tracking import AdaptiveHandTracker, RoiHandDetector, from_mediapipe
+from board.application.use_cases.hand_detector_pool import get_hand_detector_pool
+from board.application.use_cases.ink_keyframes import InkKeyframes
+from board.application.use_cases.ink_tiles import InkTiles
+from board.application.use_cases.inference_service import get_inference_service
+from board.application.use_cases.stream_broadcaster import FrameBroadcaster
+from board.infrastructure.opencv.video_capture_manager import capture_registry
 from board.application.use_cases.ui_config import BUTTONS
 
 from board.application.actions.enhance_action import EnhanceStrokeService
 
 
-mp_hands = mp.solutions.hands
-
 # Variables globales
-color = color_action.get_current_color()
-thickness = 5
-prev_point = None
-mode = "draw"
-canvas = None
-current_points = []
-
-last_frame = None
-last_canvas = None
 enhancer = EnhanceStrokeService()
 
+# Buffers reutilizados por el pipeline: deben cubrir los paquetes en vuelo
+# (5 colas + 4 etapas + vista lateral) antes de que se reescriba uno
+FRAME_BUFFERS = 12
+OUTPUT_BUFFERS = 6
+
 # ---------------------- Funciones auxiliares ----------------------
 
 def get_finger_status(hand_landmarks, handedness="Right"):
@@ -59,313 +65,845 @@ def get_finger_status(hand_landmarks, handedness="Right"):
     return fingers
 
 
+# ---------------------- Lógica de la pizarra ----------------------
 
-# ---------------------- Flujo principal ----------------------
-
-# video_stream.py (solo la función generate_frames completa)
-def generate_frames(drawing_id=None):
+class BoardSession:
     """
-    Stream de video interactivo con detección de gestos, panel de color, pincel,
-    panel de formas, modos (select, draw, enhance, eraser) y sincronización con la base de datos.
+    Estado de la pizarra durante un stream: modos, trazo en curso, formas y lienzo.
+    Recibe los landmarks de cada fotograma y aplica la lógica de gestos.
     """
-    global prev_point, canvas, mode, color, last_frame, last_canvas, pointer_data
-    global current_points, start_point, drawing_shape, shape_selected, last_active_mode
-
-    # Inicialización
-    drawing_shape = False
-    canvas = None
-    current_points = []
-    start_point = None
-    shape_selected = "rectangle"
-    last_active_mode = None
+
     SMOOTHING = 3
-    recent_index_positions = []
-    previous_color = None
-    stroke_mode = None
-    stroke_color = None
-    stroke_size = None
+    MODES = ("draw", "enhance", "eraser", "select")
+
+    def __init__(self):
+        self._pending_mode = None
+        config = getattr(settings, "BOARD_HISTORY", {})
+        self.keyframes = InkKeyframes(
+            interval=config.get("KEYFRAME_INTERVAL", 20),
+            budget_bytes=config.get("KEYFRAME_BUDGET_MB", 64) * 1024 * 1024,
+        )
+        self.tiles = InkTiles(save_action.get_stroke_index())
+        self.reset()
+
+    def request_mode(self, mode):
+        """Pide cambiar de modo desde fuera del stream (p. ej. comando WebSocket)."""
+        if mode in self.MODES:
+            self._pending_mode = mode
+
+    def request_reset(self):
+        """Pide reiniciar el estado en el próximo fotograma (hilo de la etapa de lógica)."""
+        self._reset_requested = True
+
+    def reset(self):
+        self._reset_requested = False
+        self.canvas = None
+        self.grid = None          # cuadrícula de fondo (en caché por tamaño, de solo lectura)
+        self.ink = None           # capa persistente con los colores de los trazos guardados
+        self.coverage = None      # 1 donde la capa de tinta tapa la cuadrícula, 0 donde se ve
+        self.ink_count = 0        # trazos ya dibujados en la capa de tinta
+        self.ink_revision = None  # save_action.revision con la que se sincronizó la capa
+        self.keyframes.clear()
+        self.revision = getattr(self, "revision", 0) + 1   # cambia con cada modificación del lienzo
+        self.mode = "draw"
+        self.color = color_action.get_current_color()
+        self.prev_point = None
+        self.current_points = []
+        self.start_point = None
+        self.drawing_shape = False
+        self.shape_selected = "rectangle"
+        self.last_active_mode = None
+        self.recent_index_positions = []
+        self.previous_color = None
+        self.stroke_mode = None
+        self.stroke_color = None
+        self.stroke_size = None
+
+    def rebuild_canvas(self, h, w):
+        """Redibuja el lienzo completo: cuadrícula + todos los trazos guardados."""
+        self.revision += 1
+        self.grid = grid_background(h, w)
+        self.keyframes.clear()
+        self.tiles.reset(h, w)
+        self.ink = np.full((h, w, 3), 255, np.uint8)
+        self.coverage = np.zeros((h, w), np.uint8)
+        # Lo anterior al keyframe más antiguo que cabe en el presupuesto se dibuja de una
+        # vez; después, por tramos de un intervalo para dejar solo esos keyframes
+        strokes, step = save_action.current_strokes, self.keyframes.interval
+        count = len(strokes)
+        capacity = self.keyframes.capacity(self.ink.nbytes + self.coverage.nbytes)
+        drawn = 0
+        for key in range(max(step, count // step * step - (capacity - 1) * step), count + 1, step):
+            draw_strokes(self.ink, strokes[drawn:key], self.coverage)
+            self.keyframes.record(key, self.ink, self.coverage)
+            drawn = key
+        draw_strokes(self.ink, strokes[drawn:], self.coverage)
+        self.ink_count = count
+        self.ink_revision = save_action.revision
+        self.canvas = self.grid.copy()
+        self._compose_ink((slice(None), slice(None)))
+
+    def _compose_ink(self, region):
+        """Cuadrícula + tinta en la región según la cobertura: lo borrado vuelve a mostrar la cuadrícula."""
+        canvas = self.canvas[region]
+        np.copyto(canvas, self.grid[region])
+        # Una sola mezcla vectorizada: copia la tinta donde la cobertura es 1
+        cv2.copyTo(self.ink[region], self.coverage[region], canvas)
+
+    def commit_strokes(self, h, w, live_points=()):
+        """
+        Incorpora al lienzo los trazos agregados desde la última sincronización:
+        dibuja solo esos trazos en la capa de tinta y recompone los tiles que tocan.
+        live_points: puntos del trazo dibujado en vivo, cuyos tiles también se limpian.
+        Si los trazos cambiaron de otra forma (deshacer, carga…) redibuja todo.
+        """
+        added = save_action.current_strokes[self.ink_count:]
+        if self.ink is None or self.ink.shape[:2] != (h, w) \
+                or save_action.revision - self.ink_revision != len(added):
+            self.rebuild_canvas(h, w)
+            return
+
+        dirty = self.tiles.touched(live_points, self.stroke_size or 1) if live_points else set()
+        for stroke in added:
+            draw_strokes(self.ink, [stroke], self.coverage)
+            dirty |= self.tiles.touched(stroke["points"], stroke["thickness"])
+            self.ink_count += 1
+            self.keyframes.record(self.ink_count, self.ink, self.coverage)
+        self.ink_revision = save_action.revision
+        self._recompose(dirty)
+
+    def rewind_strokes(self, h, w, removed):
+        """
+        Quita del lienzo el último trazo (deshacer): vuelve a dibujar solo los tiles que
+        tocaba, con los trazos que quedan en ellos. Si eso implica más trazos que partir
+        del keyframe de tinta más cercano (a lo sumo KEYFRAME_INTERVAL - 1), se restaura
+        el keyframe. Si los trazos cambiaron de otra forma, redibuja todo.
+        """
+        count = len(save_action.current_strokes)
+        if self.ink is None or self.ink.shape[:2] != (h, w) or count != self.ink_count - 1 \
+                or save_action.revision - self.ink_revision != 1:
+            self.rebuild_canvas(h, w)
+            return
+
+        dirty = self.tiles.touched(removed["points"], removed["thickness"])
+        self.keyframes.discard_after(count)
+        strokes = self.tiles.strokes_in(dirty)
+        if len(strokes) > self.keyframes.replay_cost(count):
+            self.keyframes.restore(self.ink, self.coverage, save_action.current_strokes, count)
+        else:
+            self.tiles.redraw(self.ink, self.coverage, dirty, strokes)
+        self.ink_count = count
+        self.ink_revision = save_action.revision
+        self._recompose(dirty)
+
+    def refresh_strokes(self, h, w, edit):
+        """
+        Aplica al lienzo un cambio en medio de los trazos (StrokeEdit del borrador, o su
+        deshacer/rehacer): vuelve a dibujar solo los tiles de los trazos reemplazados y de
+        sus trozos. Los keyframes posteriores al primer trazo cambiado dejan de servir.
+        """
+        if self.ink is None or self.ink.shape[:2] != (h, w) \
+                or save_action.revision - self.ink_revision != 1:
+            self.rebuild_canvas(h, w)
+            return
+
+        count = len(save_action.current_strokes)
+        dirty = set()
+        for stroke in edit.strokes():
+            dirty |= self.tiles.touched(stroke["points"], stroke["thickness"])
+        self.keyframes.discard_after(edit.first_index)
+        strokes = self.tiles.strokes_in(dirty)
+        if len(strokes) > self.keyframes.replay_cost(count):
+            self.keyframes.restore(self.ink, self.coverage, save_action.current_strokes, count)
+        else:
+            self.tiles.redraw(self.ink, self.coverage, dirty, strokes)
+        self.ink_count = count
+        self.ink_revision = save_action.revision
+        self._recompose(dirty)
+
+    def _recompose(self, tiles):
+        """Recompone cuadrícula + tinta en los tiles indicados."""
+        if not tiles:
+            return
+        for region in self.tiles.regions(tiles):
+            self._compose_ink(region)
+        self.revision += 1
+
+    def update(self, frame, hands, render=True):
+        """
+        Aplica la lógica de gestos de un fotograma y devuelve la imagen base
+        (lienzo + vista previa de forma) junto con el estado de UI del fotograma.
+        Con render=False (nadie mira el MJPEG) no se prepara la imagen de salida.
+        """
+        # Lienzo declarado o, por defecto, del tamaño del primer fotograma: los landmarks
+        # (relativos) se llevan a él
+        save_action.adopt_frame_size(frame.shape[1], frame.shape[0])
+        w, h = save_action.canvas_size()
+        if self._reset_requested:
+            self.reset()
+        if self._pending_mode is not None:
+            self.apply_mode(self._pending_mode, h, w)
+            self._pending_mode = None
+
+        # Crear lienzo base
+        if self.canvas is None or self.canvas.shape[:2] != (h, w):
+            self.rebuild_canvas(h, w)
+            board_events.publish("board_size", width=w, height=h)
+
+        cx, cy = None, None
+        pointer_visible = False
+        active_button = None
+        action_detected = None
+        fingers = [0, 0, 0, 0, 0]
+
+        if hands:
+            for hand_landmarks in hands:
+                fingers = get_finger_status(hand_landmarks, hand_landmarks.handedness)
+                index_finger = hand_landmarks.landmark[8]
+                cx, cy = int(index_finger.x * w), int(index_finger.y * h)
+                pointer_visible = True
+
+                # Suavizado
+                self.recent_index_positions.append([cx, cy])
+                if len(self.recent_index_positions) > self.SMOOTHING:
+                    self.recent_index_positions.pop(0)
+                avg_point = np.mean(self.recent_index_positions, axis=0).astype(int)
+                cx, cy = int(avg_point[0]), int(avg_point[1])
+
+                # 🔹 Cerrar paneles con gesto de dos dedos levantados
+                if fingers[1] and fingers[2] and not any(fingers[0:1] + fingers[3:]):
+                        if tool_action.panel_visible:
+                            tool_action.close_brush_panel()
+                        if color_action.panel_visible:
+                            color_action.close_color_panel()
+                        if shape_action.panel_visible:
+                            shape_action.close_shape_panel()
+                            self.drawing_shape = False
+                            self.start_point = None
+
+                # Actualizar tamaño del pincel/borrador
+                tool_action.update_brush_size(hand_landmarks, h, fingers)
+
+                # 🔹 Control de modos por gesto
+                if sum(fingers) == 5:
+                    if self.mode != "select":
+                        self.last_active_mode = self.mode
+                    if self.mode == "eraser" and tool_action.panel_visible:
+                        tool_action.close_brush_panel()
+                    self.mode = "select"
+
+                elif fingers[1] and fingers[2] and not any(fingers[3:]):
+                    if self.mode not in ["enhance", "eraser"]:
+                        self.mode = "draw"
+
+                # 🔹 Dibujo de formas
+                if shape_action.panel_visible:
+                    if sum(fingers) == 5 and not self.drawing_shape:
+                        shape_action.handle_shape_selection_by_gesture(cx, cy, fingers)
+
+                    if sum(fingers) == 1 and fingers[1] and not self.drawing_shape:
+                        self.start_point = (cx, cy)
+                        self.drawing_shape = True
+
+                    elif self.drawing_shape and sum(fingers) == 5:
+                        size = tool_action.get_brush_size("brush")
+                        shape_action.add_shape_to_strokes(self.start_point, (cx, cy), self.color, size)
+                        self.commit_strokes(h, w)
+
+                        self.start_point = None
+                        self.drawing_shape = False
+
+                # 🔹 Determinar active_mode
+                if self.mode == "select":
+                    active_mode = "select"
+                else:
+                    active_mode = self.mode
+                    self.last_active_mode = self.mode
+
+                drawing_allowed = active_mode in ["draw", "enhance", "eraser"]
+
+                # 🔹 Inicio o continuación de trazo
+                if drawing_allowed and fingers[1] and not any(fingers[2:]) \
+                        and not shape_action.panel_visible and not tool_action.panel_visible:
+
+                    if self.prev_point is None:
+                        # 🔹 Inicio del trazo: se fijan las propiedades del trazo
+                        self.stroke_mode = active_mode
+                        self.stroke_color = (255, 255, 255) if self.stroke_mode == "eraser" else self.color
+                        self.stroke_size = tool_action.get_brush_size(
+                            "eraser" if self.stroke_mode == "eraser" else "brush"
+                        )
+                        self.current_points = [[cx, cy]]
+                        board_events.publish("stroke_begin", point=[cx, cy], mode=self.stroke_mode,
+                                             color=[int(c) for c in self.stroke_color],
+                                             thickness=int(self.stroke_size))
+                    else:
+                        cv2.line(self.canvas, self.prev_point, (cx, cy), self.stroke_color, self.stroke_size)
+                        self.revision += 1
+                        self.current_points.append([cx, cy])
+                        board_events.publish("point_append", point=[cx, cy])
+                    self.prev_point = (cx, cy)
+
+                else:
+                    # 🔹 Fin de trazo
+                    if len(self.current_points) > 1 and self.stroke_mode is not None:
+                        if self.stroke_mode == "enhance":
+                            enhanced, detected_shape = enhancer.enhance_stroke(self.current_points)
+                            # 🔹 Aviso único por trazo: se empuja al navegador (toast)
+                            if detected_shape:
+                                push_alert(f"{detected_shape} detectado y perfeccionado.")
+                                save_action.add_stroke(enhanced, self.color, self.stroke_size)
+                            else:
+                                push_alert("No se encontró similitud con figura básica.")
+
+                        elif self.stroke_mode == "eraser":
+                            # Borrador vectorial: corta los trazos que toca en vez de agregar uno blanco
+                            edit = save_action.erase_along(self.current_points, self.stroke_size)
+                            if edit is not None:
+                                undo_redo_action.register_edit(edit)
+                                self.refresh_strokes(h, w, edit)
+                            if self.previous_color is not None:
+                                self.color = self.previous_color
+                                self.previous_color = None
+
+                        else:  # draw normal
+                            save_action.add_stroke(self.current_points, self.stroke_color, self.stroke_size)
+
+                        # 🔹 Actualizar lienzo: solo el trazo nuevo (y lo dibujado en vivo)
+                        self.commit_strokes(h, w, self.current_points)
+
+                    if self.current_points:
+                        board_events.publish("stroke_end")
+                    self.current_points = []
+                    self.prev_point = None
+                    self.stroke_mode = None
+
+                # 🔹 Toolbar principal
+                toolbar_height = int(h * 0.18)
+                if self.mode == "select" and cy and cy < toolbar_height:
+                    if not (color_action.panel_visible or shape_action.panel_visible):
+                        section_width = w // len(BUTTONS)
+                        button_index = cx // section_width
+                        if 0 <= button_index < len(BUTTONS):
+                            active_button = button_index
+                            action_name = BUTTONS[button_index][1]
+                            action_detected = action_name
+                            self.handle_toolbar_action(action_name, h, w)
+
+        # Color actual
+        if self.mode != "eraser":
+            self.color = color_action.get_current_color()
+
+        view = {
+            "cx": cx,
+            "cy": cy,
+            "pointer_visible": pointer_visible,
+            "active_button": active_button,
+            "action": action_detected,
+            "fingers": fingers,
+            "mode": self.mode,
+            "color": self.color,
+            "revision": self.revision,
+            "shape_start": self.start_point if self.drawing_shape else None,
+        }
+        return (self.render(view) if render else None), view
+
+    def render(self, view, out=None):
+        """
+        Imagen base del fotograma: copia del lienzo + vista previa de la forma.
+        out: buffer preasignado del tamaño del lienzo donde componer (si no, se crea uno).
+        """
+        if out is None:
+            output = self.canvas.copy()
+        else:
+            output = out
+            np.copyto(output, self.canvas)
+        cx, cy = view["cx"], view["cy"]
+        if view["shape_start"] is not None and cx is not None and cy is not None:
+            size = tool_action.get_brush_size("brush")
+            shape_action.draw_shape(output, view["shape_start"], (cx, cy), view["color"], size)
+        return output
+
+    def apply_mode(self, mode, h, w):
+        """Cambia de modo con las mismas reglas que la barra (el borrador alterna el color)."""
+        if mode == self.mode:
+            return
+        if mode == "eraser" or self.mode == "eraser":
+            self.handle_toolbar_action("eraser", h, w)
+        if mode != "eraser":
+            self.mode = mode
+
+    def handle_toolbar_action(self, action_name, h, w):
+        """Ejecuta la acción del botón de la barra apuntado en modo selección."""
+        if action_name == "undo":
+            removed = undo_redo_action.undo_last_stroke()
+            if isinstance(removed, save_action.StrokeEdit):
+                self.refresh_strokes(h, w, removed)
+            elif removed:
+                self.rewind_strokes(h, w, removed)
+        elif action_name == "redo":
+            restored = undo_redo_action.redo_last_stroke()
+            if isinstance(restored, save_action.StrokeEdit):
+                self.refresh_strokes(h, w, restored)
+            elif restored:
+                # Rehacer solo agrega un trazo: se dibuja como uno nuevo
+                self.commit_strokes(h, w)
+        elif action_name == "color":
+            if not tool_action.panel_visible and not shape_action.panel_visible:
+                color_action.open_color_panel()
+        elif action_name == "brush":
+            if not color_action.panel_visible and not shape_action.panel_visible:
+                tool_action.open_brush_panel(tool="brush")
+        elif action_name == "shapes":
+            if not color_action.panel_visible and not tool_action.panel_visible:
+                shape_action.open_shape_panel()
+        elif action_name == "save":
+            update_pointer(action="save_requested")
+        elif action_name == "enhance":
+            self.mode = "enhance"
+        elif action_name == "eraser":
+            if self.mode != "eraser":
+                self.previous_color = self.color
+                self.color = (255, 255, 255)
+                self.mode = "eraser"
+                tool_action.open_brush_panel(tool="eraser")
+                update_pointer(waiting_brush_close=True)
+            else:
+                self.mode = "draw"
+                if self.previous_color is not None:
+                    self.color = self.previous_color
+                    self.previous_color = None
+                self.last_active_mode = self.mode
+                self.prev_point = None
+
+
+# ---------------------- Etapas del pipeline ----------------------
+
+def compose_output(output, view):
+    """Dibuja toolbar, paneles y puntero sobre la imagen base del fotograma."""
+    cx, cy = view["cx"], view["cy"]
+    mode = view["mode"]
+    if output is None:
+        # Solo clientes vectoriales: el estado del puntero basta
+        if view["pointer_visible"] and cx is not None and cy is not None:
+            update_pointer(x=cx, y=cy, mode=mode, action=view["action"], color=list(view["color"]))
+        return None
+    h, w = output.shape[:2]
+
+    # 🔹 Dibujar toolbar y paneles
+    draw_toolbar(output, h, w, active_index=view["active_button"], current_color=view["color"])
+    tool_action.draw_brush_panel(output)
+    if color_action.panel_visible:
+        color_action.draw_advanced_color_panel(output, h, w, pointer_x=cx, pointer_y=cy, finger_states=view["fingers"])
+    shape_action.draw_shape_panel(output)
+
+    # 🔹 Puntero visual
+    if view["pointer_visible"] and cx is not None and cy is not None:
+        pointer_color = (
+            (0, 0, 255) if mode == "select"
+            else (255, 0, 255) if mode == "enhance"
+            else (95, 99, 102) if mode == "eraser"
+            else (0, 255, 0)
+        )
+        cv2.circle(output, (cx, cy), 6, pointer_color, -1)
+        update_pointer(x=cx, y=cy, mode=mode, action=view["action"], color=list(view["color"]))
+    return output
+
+
+def frame_state_key(view):
+    """
+    Todo lo que cambia la imagen compuesta: revisión del lienzo, puntero, botón
+    activo, modo, color y estado de los paneles. Si la clave se repite, el
+    fotograma saldría idéntico y no hace falta componerlo ni codificarlo.
+    """
+    pointer = (view["cx"], view["cy"]) if view["pointer_visible"] else None
+    return (
+        view["revision"], pointer, view["active_button"], view["mode"],
+        tuple(view["color"]), view["shape_start"], tuple(view["fingers"]),
+        (tool_action.panel_visible, tool_action.current_tool,
+         tool_action.brush_size_paint, tool_action.brush_size_eraser),
+        (color_action.panel_visible, color_action.current_color,
+         color_action.color_intensity, color_action.color_mode),
+        (shape_action.panel_visible, shape_action.shape_selected),
+    )
+
+
+def build_hand_tracker(hands, remote=False, buffer_pool=True):
+    """
+    Crea el rastreador de manos según settings.HAND_TRACKING.
+    remote=True si hands es una sesión del servicio de inferencia (ya devuelve HandObservation).
+    """
+    config = getattr(settings, "HAND_TRACKING", {})
+
+    detect = RoiHandDetector(
+        hands.process,
+        max_side=config.get("INPUT_MAX_SIDE", 640),
+        use_roi=config.get("ROI", True),
+        roi_margin=config.get("ROI_MARGIN", 0.5),
+        roi_size=config.get("ROI_SIZE", 320),
+        parse=None if remote else from_mediapipe,
+        buffer_pool=buffer_pool,
+    )
+    return AdaptiveHandTracker(
+        detect,
+        mode=config.get("MODE", "adaptive"),
+        target_fps=config.get("TARGET_FPS", 30),
+        max_interval=config.get("MAX_INTERVAL", 4),
+        idle_interval=config.get("IDLE_INTERVAL", 8),
+        motion_threshold=config.get("MOTION_THRESHOLD", 6.0),
+        buffer_pool=buffer_pool,
+    )
+
+
+def build_board_pipeline(session, tracker, capture_source, needs_raster=lambda: True, keepalive=1.0,
+                         preview=None, buffer_pool=True):
+    """
+    Arma el pipeline captura → inferencia → lógica → composición → codificación.
+    Cada etapa corre en su propio hilo y las colas descartan fotogramas viejos.
+    needs_raster() indica si hay visores MJPEG; si no, se omiten composición y JPEG.
+    Si el estado visible no cambió tampoco se compone ni se codifica: solo se
+    reenvía un fotograma cada keepalive segundos (o ninguno si keepalive es None).
+    preview recibe cada fotograma de la cámara para la vista lateral.
+    buffer_pool: voltear y componer sobre buffers preasignados en vez de crear arreglos.
+    """
+    preview = preview or get_camera_frames(0)
+    frames = BufferRing(FRAME_BUFFERS) if buffer_pool else None
+    outputs = BufferRing(OUTPUT_BUFFERS) if buffer_pool else None
+    last_seq = 0
+    encoded_key = None   # estado del último JPEG efectivamente codificado
+    encoded_at = 0.0
+
+    def capture():
+        nonlocal last_seq
+        # Siempre el fotograma más reciente; nunca se lee el dispositivo aquí
+        captured = capture_source.read(after_seq=last_seq, timeout=1.0)
+        if captured is None:
+            if not capture_source.running:
+                raise StopIteration
+            return None
+        last_seq = captured.seq
+        # Única copia del fotograma: el volteo sale del buffer compartido de captura
+        dst = frames.next(captured.frame.shape) if frames else None
+        frame = cv2.flip(captured.frame, 1, dst=dst)
+        if hasattr(capture_source, "is_current") and not capture_source.is_current(captured):
+            return None   # la ranura se reescribió durante el volteo
+        return FramePacket(captured.seq, captured.timestamp, frame)
+
+    def inference(packet):
+        packet.hands = tracker.process(packet.frame, packet.timestamp)
+        return packet
+
+    def board_logic(packet):
+        nonlocal encoded_key
+        _, packet.view = session.update(packet.frame, packet.hands, render=False)
+        if not needs_raster():
+            encoded_key = None
+            return packet
+
+        # 🔹 Pizarra sin cambios respecto al último JPEG: no se copia el lienzo ni se codifica.
+        # Se compara con lo codificado y no con lo renderizado: si las colas descartan
+        # el fotograma renderizado, el siguiente se vuelve a renderizar.
+        key = packet.view["key"] = frame_state_key(packet.view)
+        if key == encoded_key and (keepalive is None or time.monotonic() - encoded_at < keepalive):
+            return packet
+        packet.output = session.render(packet.view, out=outputs.next(session.canvas.shape) if outputs else None)
+        return packet
+
+    def compose(packet):
+        compose_output(packet.output, packet.view)
+        # La vista lateral recibe el mismo arreglo del paquete, sin copiarlo
+        preview.publish(packet.frame)
+        return packet
+
+    def encode(packet):
+        nonlocal encoded_key, encoded_at
+        if packet.output is None:
+            return None
+        ret, buffer = cv2.imencode('.jpg', packet.output)
+        if not ret:
+            return None
+        packet.jpeg = buffer.tobytes()
+        encoded_key, encoded_at = packet.view.get("key"), time.monotonic()
+        return packet
+
+    return FramePipeline(capture, [
+        ("inference", inference),
+        ("board", board_logic),
+        ("compose", compose),
+        ("encode", encode),
+    ], name="board")
+
+
+# ---------------------- Motor compartido por cámara ----------------------
+
+def uses_inference_processes():
+    return getattr(settings, "HAND_DETECTORS", {}).get("BACKEND", "thread") == "process"
+
+
+class BoardEngine:
+    """
+    Motor de la pizarra para una cámara: un único pipeline que infiere, compone y
+    codifica cada fotograma una sola vez y reparte los bytes a todos los visores.
+    Los visores vectoriales (WebSocket) mantienen vivo el motor sin pedir JPEG.
+    Arranca con el primer suscriptor (y recién ahí abre la cámara) y se detiene
+    cuando se va el último.
+    """
+
+    def __init__(self, device=0, queue_size=2):
+        self.device = device
+        self.capture_source = None
+        self.session = BoardSession()
+        self.drawing_id = None   # dibujo con el que se preparó la pizarra en curso
+        self.broadcaster = FrameBroadcaster(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._hands = None
+        self._pipeline = None
+        self._pump = None
+        self._vector_viewers = 0
+
+    @property
+    def running(self):
+        return self._pipeline is not None
+
+    def subscribe(self, loop=None):
+        with self._lock:
+            subscription = self.broadcaster.subscribe(loop)
+            if self._pipeline is None:
+                self._start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if self.broadcaster.unsubscribe(subscription) == 0 and self._vector_viewers == 0:
+                self._stop()
+
+    def add_vector_viewer(self):
+        """Registra un cliente que renderiza los trazos por su cuenta."""
+        with self._lock:
+            self._vector_viewers += 1
+            if self._pipeline is None:
+                self._start()
+
+    def remove_vector_viewer(self):
+        with self._lock:
+            self._vector_viewers = max(0, self._vector_viewers - 1)
+            if self._vector_viewers == 0 and self.broadcaster.count == 0:
+                self._stop()
+
+    def board_size(self):
+        """Tamaño (ancho, alto) del lienzo actual (el declarado si aún no hay fotogramas)."""
+        canvas = self.session.canvas
+        if canvas is None:
+            return save_action.canvas_size()
+        return canvas.shape[1], canvas.shape[0]
+
+    def reset_board(self):
+        """Reinicia lienzo y estado de gestos (p. ej. tras cargar otro dibujo)."""
+        self.session.request_reset()
+        self.broadcaster.forget_last()
+
+    def _start(self):
+        config = getattr(settings, "BOARD_STREAM", {})
+        self.capture_source = capture_registry.acquire(self.device)
+        if uses_inference_processes():
+            # Inferencia en los procesos del servicio, fuera del GIL del servidor web.
+            # Los procesos recién lanzados aún cargan MediaPipe: sin esperarlos, las
+            # primeras inferencias vencerían su timeout y trabarían la etapa de inferencia
+            service = get_inference_service()
+            if not service.wait_ready(timeout=getattr(settings, "HAND_DETECTORS", {}).get("READY_TIMEOUT", 30.0)):
+                print("[ERROR] Los procesos de inferencia no terminaron de cargar; se continúa igual.")
+            self._hands = service.open_session()
+            tracker = build_hand_tracker(self._hands, remote=True, buffer_pool=config.get("BUFFER_POOL", True))
+        else:
+            # Detector ya calentado del pool (MediaPipe se importa allí, no al cargar el módulo)
+            self._hands = get_hand_detector_pool().lease()
+            tracker = build_hand_tracker(self._hands, buffer_pool=config.get("BUFFER_POOL", True))
+        self._pipeline = build_board_pipeline(self.session, tracker, self.capture_source,
+                                              needs_raster=lambda: self.broadcaster.count > 0,
+                                              keepalive=config.get("KEEPALIVE", 1.0),
+                                              preview=get_camera_frames(self.device),
+                                              buffer_pool=config.get("BUFFER_POOL", True)).start()
+        self._pump = threading.Thread(target=self._pump_loop, args=(self._pipeline,),
+                                      name="board-broadcast", daemon=True)
+        self._pump.start()
+        print("[INFO] Motor de pizarra iniciado.")
+
+    def _stop(self):
+        pipeline, self._pipeline = self._pipeline, None
+        if pipeline is None:
+            return
+        pipeline.stop()
+        self.broadcaster.forget_last()
+        if self._pump is not threading.current_thread():
+            self._pump.join(timeout=2.0)
+        self._pump = None
+        if uses_inference_processes():
+            self._hands.close()
+        else:
+            get_hand_detector_pool().release(self._hands)
+        self._hands = None
+        capture_registry.release(self.device)
+        self.capture_source = None
+        print(f"[INFO] Motor de pizarra detenido ({pipeline.dropped} fotogramas descartados por etapas atrasadas).")
+
+    def _pump_loop(self, pipeline):
+        while True:
+            packet = pipeline.get(timeout=1.0)
+            if packet is None:
+                if not pipeline.running:
+                    break
+                continue
+            self.broadcaster.publish(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + packet.jpeg + b'\r\n')
+
+        # La cámara dejó de entregar fotogramas: cerrar a todos los visores
+        if self._pipeline is pipeline:
+            self.broadcaster.close_all()
+            with self._lock:
+                if self._pipeline is pipeline:
+                    self._stop()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
 
-    # Cargar o crear dibujo
+def get_board_engine():
+    """
+    Devuelve el motor de la pizarra, creándolo si no existe. Hay uno solo por proceso:
+    el dibujo, los paneles y el puntero son estado global (varias cámaras solo se
+    comparten a nivel de capture_registry).
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = BoardEngine()
+        return _engine
+
+
+# ---------------------- Flujo principal ----------------------
+
+def prepare_drawing(drawing_id=None):
+    """Carga el dibujo pedido o prepara un lienzo temporal (nuevo, sin trazos) antes de abrir el stream."""
     if drawing_id is not None:
         save_action.load_drawing(drawing_id)
     else:
-        if save_action.current_drawing is None:
-            save_action.start_new_drawing(name="Nuevo Dibujo")
-        else:
-            save_action.reset_strokes()
+        save_action.start_new_drawing(name="Nuevo Dibujo")
+
 
-    with mp_hands.Hands(max_num_hands=1,
-                        min_detection_confidence=0.8,
-                        min_tracking_confidence=0.75) as hands:
+def join_board(engine, drawing_id=None):
+    """
+    Prepara el dibujo y reinicia la pizarra solo si el motor recién arranca o se pide
+    otro dibujo. Un visor que se suma a la pizarra en curso solo se suscribe: no borra
+    los trazos ni el estado de gestos, modo y paneles de los demás. Es el único lugar
+    que carga o reinicia el dibujo para un visor (MJPEG o vectorial); al hacerlo, el
+    lienzo de la sesión se descarta y su revisión avanza en el próximo fotograma.
+    """
+    if engine.running and (drawing_id is None or drawing_id == engine.drawing_id):
+        return
+    prepare_drawing(drawing_id)
+    engine.drawing_id = drawing_id
+    engine.reset_board()
 
+
+def generate_frames(drawing_id=None):
+    """
+    Stream de video interactivo con detección de gestos, panel de color, pincel,
+    panel de formas, modos (select, draw, enhance, eraser) y sincronización con la base de datos.
+    Todos los visores comparten el mismo motor; cada uno recibe los JPEG ya codificados.
+    """
+    engine = get_board_engine()
+    join_board(engine, drawing_id)
+    subscription = engine.subscribe()
+    try:
         while True:
-            success, frame = cap.read()
-            if not success:
-                break
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-
-            # Crear lienzo base
-            if canvas is None or canvas.shape[:2] != (h, w):
-                canvas = draw_grid_background(h, w)
-                if hasattr(save_action, "current_strokes") and save_action.current_strokes:
-                    strokes_img = save_action.render_strokes(save_action.current_strokes, w, h)
-                    if strokes_img is not None:
-                        mask = strokes_img < 250
-                        canvas[mask] = strokes_img[mask]
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
-
-            cx, cy = None, None
-            pointer_visible = False
-            active_button = None
-            action_detected = None
-            fingers = [0, 0, 0, 0, 0]
-
-            try:
-                if results.multi_hand_landmarks:
-                    for hand_idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                        handedness = results.multi_handedness[hand_idx].classification[0].label
-                        fingers = get_finger_status(hand_landmarks, handedness)
-                        index_finger = hand_landmarks.landmark[8]
-                        cx, cy = int(index_finger.x * w), int(index_finger.y * h)
-                        pointer_visible = True
-
-                        # Suavizado
-                        recent_index_positions.append([cx, cy])
-                        if len(recent_index_positions) > SMOOTHING:
-                            recent_index_positions.pop(0)
-                        avg_point = np.mean(recent_index_positions, axis=0).astype(int)
-                        cx, cy = int(avg_point[0]), int(avg_point[1])
-
-                        # 🔹 Cerrar paneles con gesto de dos dedos levantados
-                        if fingers[1] and fingers[2] and not any(fingers[0:1] + fingers[3:]):
-                                if tool_action.panel_visible:
-                                    tool_action.close_brush_panel()
-                                if color_action.panel_visible:
-                                    color_action.close_color_panel()
-                                if shape_action.panel_visible:
-                                    shape_action.close_shape_panel()
-                                    drawing_shape = False
-                                    start_point = None
-
-                        # Actualizar tamaño del pincel/borrador
-                        tool_action.update_brush_size(hand_landmarks, h, fingers)
-
-                        # 🔹 Control de modos por gesto
-                        if sum(fingers) == 5:
-                            if mode != "select":
-                                last_active_mode = mode
-                            if mode == "eraser" and tool_action.panel_visible:
-                                tool_action.close_brush_panel()
-                            mode = "select"
-
-                        elif fingers[1] and fingers[2] and not any(fingers[3:]):
-                            if mode not in ["enhance", "eraser"]:
-                                mode = "draw"
-
-                        # 🔹 Dibujo de formas
-                        if shape_action.panel_visible:
-                            if sum(fingers) == 5 and not drawing_shape:
-                                shape_action.handle_shape_selection_by_gesture(cx, cy, fingers)
-
-                            if sum(fingers) == 1 and fingers[1] and not drawing_shape:
-                                start_point = (cx, cy)
-                                drawing_shape = True
-
-                            elif drawing_shape and sum(fingers) == 5:
-                                size = tool_action.get_brush_size("brush")
-                                shape_action.add_shape_to_strokes(start_point, (cx, cy), color, size)
-
-                                canvas = draw_grid_background(h, w)
-                                strokes_img = save_action.render_strokes(save_action.current_strokes, w, h)
-                                if strokes_img is not None:
-                                    mask = strokes_img < 250
-                                    canvas[mask] = strokes_img[mask]
-
-                                start_point = None
-                                drawing_shape = False
-
-                        # 🔹 Determinar active_mode
-                        if mode == "select":
-                            active_mode = "select"
-                        else:
-                            active_mode = mode
-                            last_active_mode = mode
-
-                        drawing_allowed = active_mode in ["draw", "enhance", "eraser"]
-
-                        # 🔹 Inicio o continuación de trazo
-                        if drawing_allowed and fingers[1] and not any(fingers[2:]) \
-                                and not shape_action.panel_visible and not tool_action.panel_visible:
-
-                            if prev_point is None:
-                                # 🔹 Inicio del trazo: se fijan las propiedades del trazo
-                                stroke_mode = active_mode
-                                stroke_color = (255, 255, 255) if stroke_mode == "eraser" else color
-                                stroke_size = tool_action.get_brush_size(
-                                    "eraser" if stroke_mode == "eraser" else "brush"
-                                )
-                                current_points = [[cx, cy]]
-                            else:
-                                cv2.line(canvas, prev_point, (cx, cy), stroke_color, stroke_size)
-                                current_points.append([cx, cy])
-                            prev_point = (cx, cy)
-                        
-                        else:
-                            # 🔹 Fin de trazo
-                            if len(current_points) > 1 and stroke_mode is not None:
-                                if stroke_mode == "enhance":
-                                    enhanced, detected_shape = enhancer.enhance_stroke(current_points)
-                                    if detected_shape and not pointer_data.get("alert_sent", False):
-                                        # pointer_data["alert"] = f"{detected_shape} detectado y perfeccionado."
-                                        # pointer_data["alert_sent"] = True
-                                        save_action.add_stroke(enhanced, color, stroke_size)
-                                    elif detected_shape is None:
-                                        # pointer_data["alert"] = "No se encontró similitud con figura básica."
-                                        # pointer_data["alert_sent"] = True
-                                        # save_action.add_stroke(enhanced, color, stroke_size)
-                                        pass
-
-                                elif stroke_mode == "eraser":
-                                    save_action.add_stroke(current_points, (255, 255, 255), stroke_size)
-                                    if previous_color is not None:
-                                        color = previous_color
-                                        previous_color = None
-
-                                else:  # draw normal
-                                    save_action.add_stroke(current_points, stroke_color, stroke_size)
-
-                                # 🔹 Actualizar lienzo
-                                canvas = draw_grid_background(h, w)
-                                strokes_img = save_action.render_strokes(save_action.current_strokes, w, h)
-                                if strokes_img is not None:
-                                    mask = strokes_img < 250
-                                    canvas[mask] = strokes_img[mask]
-
-                            current_points = []
-                            prev_point = None
-                            stroke_mode = None
-
-                        # 🔹 Toolbar principal
-                        toolbar_height = int(h * 0.18)
-                        if mode == "select" and cy and cy < toolbar_height:
-                            if not (color_action.panel_visible or shape_action.panel_visible):
-                                section_width = w // len(BUTTONS)
-                                button_index = cx // section_width
-                                if 0 <= button_index < len(BUTTONS):
-                                    active_button = button_index
-                                    action_name = BUTTONS[button_index][1]
-                                    action_detected = action_name
-
-                                    if action_name == "undo":
-                                        if undo_redo_action.undo_last_stroke():
-                                            canvas = draw_grid_background(h, w)
-                                            strokes_img = save_action.render_strokes(save_action.current_strokes, w, h)
-                                            if strokes_img is not None:
-                                                mask = strokes_img < 250
-                                                canvas[mask] = strokes_img[mask]
-                                    elif action_name == "redo":
-                                        if undo_redo_action.redo_last_stroke():
-                                            canvas = draw_grid_background(h, w)
-                                            strokes_img = save_action.render_strokes(save_action.current_strokes, w, h)
-                                            if strokes_img is not None:
-                                                mask = strokes_img < 250
-                                                canvas[mask] = strokes_img[mask]
-                                    elif action_name == "color":
-                                        if not tool_action.panel_visible and not shape_action.panel_visible:
-                                            color_action.open_color_panel()
-                                    elif action_name == "brush":
-                                        if not color_action.panel_visible and not shape_action.panel_visible:
-                                            tool_action.open_brush_panel(tool="brush")
-                                    elif action_name == "shapes":
-                                        if not color_action.panel_visible and not tool_action.panel_visible:
-                                            shape_action.open_shape_panel()
-                                    elif action_name == "save":
-                                        pointer_data["action"] = "save_requested"
-                                    elif action_name == "enhance":
-                                        mode = "enhance"
-                                    elif action_name == "eraser":
-                                        if mode != "eraser":
-                                            previous_color = color
-                                            color = (255, 255, 255)
-                                            mode = "eraser"
-                                            tool_action.open_brush_panel(tool="eraser")
-                                            pointer_data["waiting_brush_close"] = True
-                                        else:
-                                            mode = "draw"
-                                            if previous_color is not None:
-                                                color = previous_color
-                                                previous_color = None
-                                            last_active_mode = mode
-                                            prev_point = None
-
-            except Exception as e:
-                print(f"[ERROR en frame]: {e}")
+            chunk = subscription.get(timeout=1.0)
+            if chunk is None:
+                if subscription.closed:
+                    break
                 continue
+            yield chunk
+    finally:
+        engine.unsubscribe(subscription)
 
-            # Color actual
-            if mode != "eraser":
-                color = color_action.get_current_color()
 
-            # 🔹 Dibujar UI y vista previa de la forma
-            if drawing_shape and start_point is not None and cx is not None and cy is not None:
-                temp_canvas = canvas.copy()
-                size = tool_action.get_brush_size("brush")
-                shape_action.draw_shape(temp_canvas, start_point, (cx, cy), color, size)
-                output = temp_canvas
-            else:
-                output = canvas.copy()
-
-            # 🔹 Dibujar toolbar y paneles
-            draw_toolbar(output, h, w, active_index=active_button, current_color=color)
-            tool_action.draw_brush_panel(output)
-            if color_action.panel_visible:
-                color_action.draw_advanced_color_panel(output, h, w, pointer_x=cx, pointer_y=cy, finger_states=fingers)
-            shape_action.draw_shape_panel(output)
-
-            # 🔹 Puntero visual
-            if pointer_visible and cx is not None and cy is not None:
-                pointer_color = (
-                    (0, 0, 255) if mode == "select"
-                    else (255, 0, 255) if mode == "enhance"
-                    else (95, 99, 102) if mode == "eraser"
-                    else (0, 255, 0)
-                )
-                cv2.circle(output, (cx, cy), 6, pointer_color, -1)
-                pointer_data.update({"x": cx, "y": cy, "mode": mode, "action": action_detected})
-
-            with lock:
-                last_frame = frame.copy()
-                last_canvas = output.copy()
-
-            ret, buffer = cv2.imencode('.jpg', output)
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+async def agenerate_frames(drawing_id=None):
+    """
+    Versión async de generate_frames para servidores ASGI: espera los fotogramas
+    del motor en el event loop, sin ocupar un hilo por visor.
+    """
+    engine = get_board_engine()
+    await sync_to_async(join_board)(engine, drawing_id)
+    # Arrancar el motor puede tardar (MediaPipe), se hace fuera del event loop
+    subscription = await asyncio.to_thread(engine.subscribe, asyncio.get_running_loop())
+    try:
+        while True:
+            chunk = await subscription.get(timeout=1.0)
+            if chunk is None:
+                if subscription.closed:
+                    break
+                continue
+            yield chunk
+    finally:
+        await asyncio.to_thread(engine.unsubscribe, subscription)
 
 
 # ---------------------- Cámara lateral ----------------------
 
-def generate_camera_frames():
-    global last_frame
+def _camera_preview_config():
+    config = getattr(settings, "CAMERA_PREVIEW", {})
+    return (
+        config.get("WIDTH", 320),
+        1.0 / max(1, config.get("FPS", 15)),
+        [cv2.IMWRITE_JPEG_QUALITY, config.get("QUALITY", 75)],
+    )
+
+
+def _encode_preview(frame, preview_width, encode_params):
+    h, w = frame.shape[:2]
+    if w > preview_width:
+        frame = cv2.resize(frame, (preview_width, int(h * preview_width / w)), interpolation=cv2.INTER_AREA)
+    ret, buffer = cv2.imencode('.jpg', frame, encode_params)
+    return (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' +
+            buffer.tobytes() + b'\r\n')
+
+
+def generate_camera_frames(device=0):
+    """
+    Vista previa de la cámara: solo codifica cuando generate_frames publica un
+    fotograma nuevo, reducido a settings.CAMERA_PREVIEW y con tope de FPS.
+    """
+    preview_width, min_interval, encode_params = _camera_preview_config()
+    camera_frames = get_camera_frames(device)
+
+    version = 0
     while True:
-        if last_frame is None:
+        published = camera_frames.wait(after_version=version, timeout=1.0)
+        if published is None:
             continue
-        with lock:
-            frame = last_frame.copy()
-        ret, buffer = cv2.imencode('.jpg', frame)
-        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' +
-               buffer.tobytes() + b'\r\n')
-
-# ---------------------- Datos del puntero ----------------------
-
-def get_pointer_data(request):
-    global pointer_data
-    return JsonResponse(pointer_data)
-
-@csrf_exempt
-def reset_redirect(request):
-    global pointer_data
-    pointer_data["redirect"] = False
-    pointer_data["url"] = None
-    return JsonResponse({"status": "ok"})
+        version, frame = published
+        sent_at = time.monotonic()
+        yield _encode_preview(frame, preview_width, encode_params)
+
+        # Tope de FPS: los fotogramas publicados mientras tanto se saltan
+        remaining = min_interval - (time.monotonic() - sent_at)
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+async def agenerate_camera_frames(device=0):
+    """Versión async de generate_camera_frames para servidores ASGI."""
+    preview_width, min_interval, encode_params = _camera_preview_config()
+    camera_frames = get_camera_frames(device)
+
+    version = 0
+    while True:
+        published = await camera_frames.wait_async(after_version=version, timeout=1.0)
+        if published is None:
+            continue
+        version, frame = published
+        sent_at = time.monotonic()
+        yield await asyncio.to_thread(_encode_preview, frame, preview_width, encode_params)
+
+        remaining = min_interval - (time.monotonic() - sent_at)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
@@ -1,6 +1,36 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+# Procesos que sirven la pizarra (el resto no necesita MediaPipe)
+SERVER_PROGRAMS = ("daphne", "uvicorn", "gunicorn", "hypercorn")
+
+
+def serves_streams():
+    program = sys.argv[0] if sys.argv else ""
+    if os.path.basename(program) in ("manage.py", "__main__.py") and len(sys.argv) > 1:
+        if sys.argv[1] == "runserver":
+            # Con autoreload solo el proceso hijo atiende peticiones
+            return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+    return any(name in program for name in SERVER_PROGRAMS)
 
 
 class BoardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'board'
+
+    def ready(self):
+        # Precalentar los detectores de manos en segundo plano al arrancar el servidor
+        if not getattr(settings, "HAND_DETECTORS", {}).get("WARM_ON_START", True):
+            return
+        if not serves_streams():
+            return
+
+        if getattr(settings, "HAND_DETECTORS", {}).get("BACKEND", "thread") == "process":
+            from board.application.use_cases.inference_service import get_inference_service
+            get_inference_service()
+        else:
+            from board.application.use_cases.hand_detector_pool import get_hand_detector_pool
+            get_hand_detector_pool().warm(background=True)
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+
+class FrameSourcePort(ABC):
+    """
+    Origen de fotogramas BGR para el pipeline de la pizarra
+    (cámara, video grabado, secuencia de imágenes o generador sintético).
+    """
+
+    name = "source"
+
+    @abstractmethod
+    def open(self):
+        """Abre el origen; devuelve True si quedó listo para leer."""
+        pass
+
+    @abstractmethod
+    def read(self, out=None):
+        """
+        Devuelve (ok, frame) igual que cv2.VideoCapture.read.
+        Si out tiene la forma correcta, el fotograma se escribe allí y frame es out.
+        """
+        pass
+
+    @abstractmethod
+    def is_opened(self):
+        pass
+
+    @abstractmethod
+    def release(self):
+        pass
@@ -0,0 +1,162 @@
+import asyncio
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from board.application.actions import save_action
+from board.application.use_cases import board_events
+from board.application.use_cases.pointer_state import pointer_data, update_pointer
+
+# Eventos de trazos que solo reciben los clientes en modo vectorial
+VECTOR_EVENTS = {
+    "stroke_begin", "point_append", "stroke_end",
+    "stroke_add", "shape_add", "undo", "redo", "strokes_edit", "board_reset", "board_size",
+}
+# Eventos en cola por cliente: si un cliente vectorial se atrasa más, se descartan
+# sus eventos de trazos y recibe una instantánea completa en su lugar
+MAX_PENDING = 5000
+
+
+class BoardConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Canal WebSocket de la pizarra.
+    Empuja al navegador los cambios de puntero, modo, acción, alertas y cambios
+    sin guardar apenas ocurren, y recibe comandos (set_mode, save, ...).
+    Reemplaza el sondeo de /pointer-data/ y /check-unsaved/.
+    En modo vectorial también reenvía los eventos de trazos para que el
+    navegador dibuje la pizarra sin recibir MJPEG.
+    """
+
+    async def connect(self):
+        self.loop = asyncio.get_running_loop()
+        self.vector = False
+        self.pending = deque()
+        self.resync = False   # hay que enviar una instantánea vectorial nueva
+        self.latest_pointer = None
+        self.wakeup = asyncio.Event()
+        await self.accept()
+
+        board_events.subscribe(self.on_board_event)
+        self.sender = asyncio.create_task(self.send_events())
+        await self.send_json({
+            "type": "state",
+            "pointer": dict(pointer_data),
+            "unsaved": save_action.has_unsaved_changes(),
+        })
+
+    async def disconnect(self, code):
+        board_events.unsubscribe(self.on_board_event)
+        sender = getattr(self, "sender", None)
+        if sender is not None:
+            sender.cancel()
+        if getattr(self, "vector", False):
+            from board.application.use_cases.video_stream import get_board_engine
+            await asyncio.to_thread(get_board_engine().remove_vector_viewer)
+
+    # ---------------------- Eventos del motor → navegador ----------------------
+
+    def on_board_event(self, event):
+        """Llamado desde los hilos del motor: se reenvía al event loop del socket."""
+        if event["type"] in VECTOR_EVENTS and not self.vector:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.enqueue, event)
+        except RuntimeError:
+            pass
+
+    def enqueue(self, event):
+        # Del puntero solo importa el último estado; el resto (acciones incluidas) se envía en orden
+        if event["type"] == "pointer":
+            self.latest_pointer = event
+        elif event["type"] in VECTOR_EVENTS and self.resync:
+            pass   # la instantánea pendiente ya lo incluye
+        elif event["type"] in VECTOR_EVENTS and len(self.pending) >= MAX_PENDING:
+            # Perder eventos sueltos desincronizaría el dibujo sin que el cliente lo note
+            self.pending = deque(e for e in self.pending if e["type"] not in VECTOR_EVENTS)
+            self.resync = True
+        else:
+            self.pending.append(event)
+        self.wakeup.set()
+
+    async def send_events(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.pending:
+                await self.send_json(self.pending.popleft())
+            if self.resync:
+                from board.application.use_cases.video_stream import get_board_engine
+                self.resync = False
+                await self.send_json({"type": "vector_snapshot", **self.vector_snapshot(get_board_engine())})
+            if self.latest_pointer is not None:
+                event, self.latest_pointer = self.latest_pointer, None
+                await self.send_json(event)
+
+    # ---------------------- Comandos navegador → servidor ----------------------
+
+    async def receive_json(self, content, **kwargs):
+        command = content.get("command")
+        request_id = content.get("request_id")
+
+        if command == "set_mode":
+            from board.application.use_cases.video_stream import BoardSession, get_board_engine
+            mode = content.get("mode")
+            if mode not in BoardSession.MODES:
+                await self.reply(request_id, status="error", message=f"Modo desconocido: {mode}")
+                return
+            get_board_engine().session.request_mode(mode)
+            await self.reply(request_id, status="ok", mode=mode)
+
+        elif command == "save":
+            user = self.scope.get("user")
+            if user is None or not user.is_authenticated:
+                await self.reply(request_id, success=False, message="Debes iniciar sesión para guardar")
+                return
+            try:
+                result = await sync_to_async(save_action.save_named_drawing)(content.get("name"), user)
+            except Exception as e:
+                result = {"success": False, "message": f"Error: {str(e)}"}
+            await self.reply(request_id, **result)
+
+        elif command == "subscribe_vector":
+            from board.application.use_cases.video_stream import get_board_engine, join_board
+            engine = get_board_engine()
+            if not self.vector:
+                self.vector = True
+                # Solo una pizarra que recién arranca (u otro dibujo) se prepara; si ya hay visores, se suma a ella
+                await sync_to_async(join_board)(engine, content.get("drawing_id"))
+                # Arrancar el motor puede tardar (MediaPipe), se hace fuera del event loop
+                await asyncio.to_thread(engine.add_vector_viewer)
+            await self.reply(request_id, **self.vector_snapshot(engine))
+
+        elif command == "vector_snapshot":
+            from board.application.use_cases.video_stream import get_board_engine
+            await self.reply(request_id, **self.vector_snapshot(get_board_engine()))
+
+        elif command == "reset_redirect":
+            update_pointer(redirect=False, url=None)
+            await self.reply(request_id, status="ok")
+
+        elif command == "reset_unsaved":
+            save_action.set_unsaved(False)
+            await self.reply(request_id, status="ok")
+
+        elif command == "check_unsaved":
+            await self.reply(request_id, unsaved=save_action.has_unsaved_changes())
+
+        else:
+            await self.reply(request_id, status="error", message=f"Comando desconocido: {command}")
+
+    def vector_snapshot(self, engine):
+        """Estado completo de los trazos; los eventos con revisión menor se ignoran en el cliente."""
+        width, height = engine.board_size()
+        return {
+            "revision": save_action.revision,
+            "strokes": list(save_action.current_strokes),
+            "width": width,
+            "height": height,
+        }
+
+    async def reply(self, request_id, **payload):
+        await self.send_json({"type": "reply", "request_id": request_id, **payload})
@@ -5,8 +5,11 @@ class Drawing(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="drawings", null=True, blank=True)
     name = models.CharField(max_length=200, default="Untitled")
     strokes = models.JSONField(default=list)
+    # Lienzo declarado: con normalized los puntos son relativos (0-1) a width/height
+    # y el grosor relativo a height; los dibujos antiguos guardan píxeles absolutos
     width = models.IntegerField(default=640)
     height = models.IntegerField(default=480)
+    normalized = models.BooleanField(default=True)
     background_color = models.CharField(max_length=20, default="#FFFFFF")
     thumbnail = models.ImageField(upload_to="thumbs/", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from board.infrastructure.django import consumers
+
+websocket_urlpatterns = [
+    path("ws/board/", consumers.BoardConsumer.as_asgi()),
+]
@@ -1,9 +1,5 @@
 from django.urls import path
 from board.infrastructure.django import views
-from board.application.use_cases.video_stream import (
-    get_pointer_data,
-    reset_redirect,
-)
 
 urlpatterns = [
     # API
@@ -21,6 +17,7 @@ urlpatterns = [
     path("gallery/", views.gallery_view, name="gallery"),
     path("drawing/<int:drawing_id>/", views.edit_drawing_view, name="edit_drawing"),
     path("drawing/<int:drawing_id>/delete/", views.delete_drawing, name="delete_drawing"),
+    path("drawing/<int:drawing_id>/export/", views.export_drawing, name="export_drawing"),
     path("manual/", views.manual, name="manual"),
 
     # Streams
@@ -29,9 +26,9 @@ urlpatterns = [
     path("camera_feed/", views.camera_feed, name="camera_feed"),
 
     # Control puntero
-    path("pointer-data/", get_pointer_data, name="pointer_data"),
+    path("pointer-data/", views.get_pointer_data, name="pointer_data"),
     path("set_mode/<str:mode>/", views.set_mode, name="set_mode"),
-    path("reset_redirect/", reset_redirect, name="reset_redirect"),
+    path("reset_redirect/", views.reset_pointer_redirect, name="reset_redirect"),
     path("check-unsaved/", views.check_unsaved_changes, name="check_unsaved_changes"),
     path("reset-unsaved/", views.reset_unsaved, name="reset_unsaved"),
     path("reset-redirect/", views.reset_redirect, name="reset_redirect"),
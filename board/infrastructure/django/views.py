@@ -1,45 +1,45 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 import json
 import os
-import cv2
-import numpy as np
 
 from board.infrastructure.django.models import Drawing
 
-from board.application.use_cases.video_stream import (
-    generate_frames,
-    generate_camera_frames,
-)
-
 from board.application.actions import save_action
+from board.application.use_cases.pointer_state import pointer_data, update_pointer
+from board.application.use_cases.ui_config import BUTTONS
+
+# Las vistas de streaming importan video_stream (OpenCV + MediaPipe) al abrirse
+# el primer stream; el resto de las páginas arrancan sin cargarlo.
 
 @require_GET
 def check_unsaved_changes(request):
     """
     Devuelve si hay cambios sin guardar en el lienzo actual.
     """
-    # Si no hay trazos, no hay nada que guardar
-    if not save_action.current_strokes or len(save_action.current_strokes) == 0:
-        return JsonResponse({"unsaved": False})
-    
-    # Si hay trazos, verificar si están sin guardar
-    unsaved = getattr(save_action, "unsaved_changes", True)
-    
-    return JsonResponse({"unsaved": unsaved})
+    return JsonResponse({"unsaved": save_action.has_unsaved_changes()})
 
 @require_POST
 def reset_unsaved(request):
     """
     Marca que ya no hay cambios sin guardar (por ejemplo, tras guardar o salir).
     """
-    save_action.unsaved_changes = False
+    save_action.set_unsaved(False)
+    return JsonResponse({"status": "ok"})
+
+def get_pointer_data(request):
+    return JsonResponse(pointer_data)
+
+@csrf_exempt
+def reset_pointer_redirect(request):
+    update_pointer(redirect=False, url=None)
     return JsonResponse({"status": "ok"})
 
 @require_POST
@@ -59,7 +59,8 @@ def save_drawing(request):
         payload = json.loads(request.body)
         name = payload.get("name", "Untitled")
         strokes = payload.get("strokes", [])
-        d = Drawing.objects.create(name=name, strokes=strokes)
+        # La API recibe trazos en píxeles del lienzo declarado (640x480 por defecto)
+        d = Drawing.objects.create(name=name, strokes=strokes, normalized=False)
         return JsonResponse({"id": d.id})
     return JsonResponse({"error":"invalid method"}, status=400)
 
@@ -74,6 +75,9 @@ def get_drawing(request, pk):
             "id": d.id,
             "name": d.name,
             "strokes": d.strokes,
+            "width": d.width,
+            "height": d.height,
+            "normalized": d.normalized,
             "created_at": d.created_at.isoformat(),
         })
     except Drawing.DoesNotExist:
@@ -88,23 +92,19 @@ def canvas_view(request, drawing_id=None):
 
     if drawing_id is not None:
         drawing = get_object_or_404(Drawing, pk=drawing_id)
-        print(f"🖼 Cargando dibujo existente: {drawing.id}")
-        save_action.load_drawing(drawing.id)
-    
-    else:
-        print("🆕 Creando nuevo dibujo temporal.")
-        if save_action.current_drawing is not None and save_action.unsaved_changes:
-            print("⚠ Hay cambios sin guardar. Creando nuevo dibujo independiente.")
-            save_action.reset_globals()
-        save_action.start_new_drawing(name="Nuevo Dibujo")
-    
+        print(f"🖼 Abriendo dibujo existente: {drawing.id}")
+    # El dibujo se carga (o se prepara el lienzo temporal) al unirse al stream: join_board
+
     # 🔹 Obtener los últimos dibujos para mostrar en el panel lateral
     recent_drawings = Drawing.objects.filter(user=request.user).order_by('-updated_at')
 
     # 🔹 Renderizar plantilla en todos los casos
     return render(request, "board/canvas.html", {
         "drawing": drawing,
-        "recent_drawings": recent_drawings
+        "recent_drawings": recent_drawings,
+        # ?mode=vector → el navegador dibuja los trazos recibidos por WebSocket
+        "vector_mode": request.GET.get("mode") == "vector",
+        "toolbar_buttons": BUTTONS,
     })
 
 @login_required
@@ -121,22 +121,39 @@ def gallery_view(request):
         if needs_regen:
             print(f"[🖼] Regenerando miniatura para dibujo ID={drawing.id}...")
             try:
-                img = save_action.render_strokes(
-                    drawing.strokes,
-                    drawing.width,
-                    drawing.height
-                )
-
-                os.makedirs(thumb_dir, exist_ok=True)
-                cv2.imwrite(thumb_path, img)
-
-                drawing.thumbnail = f"thumbs/thumb_{drawing.id}.jpg"
-                drawing.save(update_fields=["thumbnail"])
+                # Se rasteriza directo al tamaño de la miniatura, no al del lienzo
+                save_action.save_thumbnail(drawing)
             except Exception as e:
                 print(f"[ERROR] No se pudo generar miniatura para dibujo {drawing.id}: {e}")
 
     return render(request, "board/gallery.html", {"drawings": drawings})
 
+@login_required
+def export_drawing(request, drawing_id):
+    """
+    Descarga el dibujo como PNG rasterizado a la escala pedida (?scale=2 para alta
+    resolución), directo desde los trazos: no se escala una imagen ya renderizada.
+    """
+    drawing = get_object_or_404(Drawing, pk=drawing_id, user=request.user)
+    try:
+        scale = float(request.GET.get("scale", 1))
+    except ValueError:
+        scale = 1.0
+
+    from board.application.use_cases.stroke_coordinates import source_size
+    width, height = source_size(drawing)
+    max_side = getattr(settings, "BOARD_CANVAS", {}).get("EXPORT_MAX_SIDE", 4096)
+    scale = max(0.1, min(scale, max_side / max(width, height)))
+
+    import cv2
+    img = save_action.render_drawing(drawing, width=max(1, round(width * scale)))
+    ok, buffer = cv2.imencode(".png", img)
+    if not ok:
+        return JsonResponse({"error": "No se pudo exportar el dibujo"}, status=500)
+    response = HttpResponse(buffer.tobytes(), content_type="image/png")
+    response["Content-Disposition"] = f'attachment; filename="drawing_{drawing.id}.png"'
+    return response
+
 def edit_drawing_view(request, drawing_id):
     drawing = get_object_or_404(Drawing, pk=drawing_id)
     save_action.load_drawing(drawing.id)  
@@ -154,40 +171,46 @@ def delete_drawing(request, drawing_id):
 def manual(request):
     return render(request, 'board/manual.html')
 
+def _mjpeg_response(request, sync_stream, async_stream):
+    """
+    Respuesta MJPEG: bajo ASGI usa el generador async (no ocupa un hilo por visor),
+    bajo WSGI el generador sync de siempre.
+    """
+    stream = async_stream() if isinstance(request, ASGIRequest) else sync_stream()
+    return StreamingHttpResponse(stream, content_type="multipart/x-mixed-replace; boundary=frame")
+
 def video_feed(request, drawing_id):
     """
     Streaming del dibujo existente.
     Carga el dibujo en memoria y lanza generate_frames con el id.
     """
+    from board.application.use_cases.video_stream import generate_frames, agenerate_frames
+
     print(f"🎥 Solicitado stream para dibujo {drawing_id}")
-    return StreamingHttpResponse(
-        generate_frames(drawing_id),
-        content_type="multipart/x-mixed-replace; boundary=frame"
+    return _mjpeg_response(
+        request,
+        lambda: generate_frames(drawing_id),
+        lambda: agenerate_frames(drawing_id),
     )
 
 def video_feed_blank(request):
     """
     Streaming para un lienzo en blanco.
-    Si ya existe un lienzo activo sin guardar, lo reutiliza.
+    Si la pizarra ya está en curso, se suma a ella sin reiniciarla.
     """
-    print("🎥 Iniciando stream para lienzo en blanco...")
+    from board.application.use_cases.video_stream import generate_frames, agenerate_frames
 
-    # 🔹 Si hay un dibujo cargado desde galería, NO lo reiniciamos
-    if save_action.current_drawing is not None and save_action.current_drawing.id is None:
-        # Solo si es un nuevo dibujo temporal
-        print(f"⚠ Reutilizando lienzo temporal existente (ID temporal)")
-        save_action.reset_strokes()
-    else:
-        print("🆕 Creando nuevo dibujo temporal.")
-        save_action.start_new_drawing(name="Nuevo Dibujo")
-
-    return StreamingHttpResponse(
-        generate_frames(None),
-        content_type="multipart/x-mixed-replace; boundary=frame"
+    print("🎥 Iniciando stream para lienzo en blanco...")
+    return _mjpeg_response(
+        request,
+        lambda: generate_frames(None),
+        lambda: agenerate_frames(None),
     )
 
 def camera_feed(request):
-    return StreamingHttpResponse(generate_camera_frames(), content_type='multipart/x-mixed-replace; boundary=frame')
+    from board.application.use_cases.video_stream import generate_camera_frames, agenerate_camera_frames
+
+    return _mjpeg_response(request, generate_camera_frames, agenerate_camera_frames)
 
 current_mode = "brush"
 
@@ -203,52 +226,8 @@ def save_drawing_with_name(request):
     """Guarda el dibujo con el nombre proporcionado por el usuario."""
     try:
         data = json.loads(request.body)
-        drawing_name = data.get("name", "Dibujo sin título").strip()
-        
-        if not drawing_name:
-            drawing_name = "Dibujo sin título"
-        
-        # Verificar si hay trazos
-        if not save_action.current_strokes or len(save_action.current_strokes) == 0:
-            return JsonResponse({
-                "success": False,
-                "message": "No se puede guardar un dibujo vacío"
-            })
-        
-        # 🔹 VERIFICAR SI YA EXISTE OTRO DIBUJO CON ESE NOMBRE
-        all_drawings = Drawing.objects.filter(user=request.user)
-
-        # 🔹 IMPORTANTE: Excluir el dibujo actual de la búsqueda (si existe)
-        if save_action.current_drawing and save_action.current_drawing.id:
-            all_drawings = all_drawings.exclude(id=save_action.current_drawing.id)
-
-        # Comparar nombres en minúsculas
-        for drawing in all_drawings:
-            if drawing.name.lower() == drawing_name.lower():
-                return JsonResponse({
-                    "success": False,
-                    "message": f"Ya existe un dibujo con el nombre '{drawing_name}'. Por favor elige otro nombre.",
-                    "duplicate": True
-                })
-        
-        # 🔹 GUARDAR (siempre actualiza si existe, o crea nuevo si no existe)
-        drawing = save_action.save_current_drawing(name=drawing_name)
-        
-        if drawing:
-            drawing.user = request.user
-            drawing.save(update_fields=["user"])
-
-            return JsonResponse({
-                "success": True,
-                "message": f"Dibujo '{drawing_name}' guardado correctamente",
-                "drawing_id": drawing.id
-            })
-        else:
-            return JsonResponse({
-                "success": False,
-                "message": "Error al guardar el dibujo"
-            })
-            
+        return JsonResponse(save_action.save_named_drawing(data.get("name", "Dibujo sin título"), request.user))
+
     except Exception as e:
         return JsonResponse({
             "success": False,
@@ -302,4 +281,4 @@ def register_user(request):
 
 def logout_user(request):
     logout(request)
-    return redirect('home')
\ No newline at end of file
+    return redirect('home')
\ No newline at end of file
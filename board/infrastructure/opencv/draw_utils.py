@@ -2,18 +2,36 @@ import cv2
 import numpy as np
 from board.application.use_cases.ui_config import BUTTONS
 import os
+from functools import lru_cache
 from django.conf import settings
 
-def draw_grid_background(h, w, spacing=20):
-    """Dibuja una cuadrícula suave como fondo."""
-    bg = np.ones((h, w, 3), np.uint8) * 255
+@lru_cache(maxsize=8)
+def grid_background(h, w, spacing=20):
+    """Cuadrícula de fondo generada una vez por (alto, ancho, separación); es de solo lectura."""
+    bg = np.full((h, w, 3), 255, np.uint8)
     color_line = (220, 220, 220)
-    for y in range(0, h, spacing):
-        cv2.line(bg, (0, y), (w, y), color_line, 1)
-    for x in range(0, w, spacing):
-        cv2.line(bg, (x, 0), (x, h), color_line, 1)
+    bg[::spacing, :] = color_line
+    bg[:, ::spacing] = color_line
+    bg.flags.writeable = False
     return bg
 
+@lru_cache(maxsize=None)
+def load_icon(icon_file, icon_size=45):
+    """
+    Lee y redimensiona un icono una sola vez → (bgr, alpha) o None si no existe.
+    alpha es (size, size, 1) en float32, listo para mezclar; None si el icono es opaco.
+    """
+    icon_path = os.path.join(settings.STATICFILES_DIRS[0], "board", "icons", icon_file)
+    if not os.path.exists(icon_path):
+        return None
+    icon = cv2.imread(icon_path, cv2.IMREAD_UNCHANGED)
+    if icon is None:
+        return None
+    icon = cv2.resize(icon, (icon_size, icon_size))
+    if icon.shape[2] == 4:
+        return icon[:, :, :3].astype(np.float32), icon[:, :, 3:].astype(np.float32) / 255.0
+    return icon, None
+
 def draw_toolbar(frame, h, w, active_index=None, current_color=(0, 0, 0)):
     """Dibuja la barra de herramientas con íconos centrados."""
     toolbar_height = int(h * 0.18)
@@ -43,31 +61,20 @@ def draw_toolbar(frame, h, w, active_index=None, current_color=(0, 0, 0)):
                           (80, 80, 80), 2)
             continue
 
-        # Ruta del icono
-        icon_path = os.path.join(settings.STATICFILES_DIRS[0], "board", "icons", icon_file)
-        if not os.path.exists(icon_path):
+        # Icono ya leído y redimensionado (caché)
+        icon_size = 45
+        cached = load_icon(icon_file, icon_size)
+        if cached is None:
             cv2.putText(frame, "?", (center_x - 10, center_y + 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             continue
-
-        # Leer icono
-        icon = cv2.imread(icon_path, cv2.IMREAD_UNCHANGED)
-        if icon is None:
-            continue
-
-        # Redimensionar
-        icon_size = 45
-        icon = cv2.resize(icon, (icon_size, icon_size))
+        icon, alpha = cached
         x_offset = center_x - icon_size // 2
         y_offset = center_y - icon_size // 2
+        region = frame[y_offset:y_offset + icon_size, x_offset:x_offset + icon_size]
 
         # Dibujar con transparencia
-        if icon.shape[2] == 4:
-            alpha = icon[:, :, 3] / 255.0
-            for c in range(3):
-                frame[y_offset:y_offset + icon_size, x_offset:x_offset + icon_size, c] = (
-                    alpha * icon[:, :, c] +
-                    (1 - alpha) * frame[y_offset:y_offset + icon_size, x_offset:x_offset + icon_size, c]
-                )
+        if alpha is not None:
+            region[:] = alpha * icon + (1 - alpha) * region
         else:
-            frame[y_offset:y_offset + icon_size, x_offset:x_offset + icon_size] = icon
\ No newline at end of file
+            region[:] = icon
\ No newline at end of file
@@ -0,0 +1,250 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+from board.domain.services.frame_source import FrameSourcePort
+
+
+BACKENDS = {
+    "any": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "ffmpeg": cv2.CAP_FFMPEG,
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def default_backend():
+    """DirectShow en Windows (comportamiento original), V4L2 en Linux y automático en el resto."""
+    if sys.platform.startswith("win"):
+        return cv2.CAP_DSHOW
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+class _Pacer:
+    """Entrega los fotogramas a un ritmo fijo, como lo haría una cámara."""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next is None or now - self._next > self.interval:
+            # Primer fotograma o el consumidor se atrasó: no recuperar a ráfagas
+            self._next = now
+        elif self._next > now:
+            time.sleep(self._next - now)
+        self._next += self.interval
+
+
+# ---------------------- Cámara ----------------------
+
+class CameraSource(FrameSourcePort):
+    """
+    Cámara vía cv2.VideoCapture con propiedades configurables.
+    Las que queden en None se dejan como las tenga el controlador.
+    """
+
+    def __init__(self, device=0, backend="auto", width=None, height=None, fps=None,
+                 fourcc=None, buffer_size=1):
+        self.device = device
+        self.backend = default_backend() if backend in (None, "auto") else BACKENDS.get(backend, backend)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.name = f"camera-{device}"
+        self._cap = None
+
+    def open(self):
+        self._cap = cv2.VideoCapture(self.device, self.backend)
+        if not self._cap.isOpened():
+            print(f"[ERROR] No se pudo abrir la cámara {self.device}.")
+            return False
+
+        # El FOURCC va antes que la resolución: V4L2 elige los tamaños según el formato
+        if self.fourcc:
+            self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width:
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            self._cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        print(f"[INFO] Cámara {self.device} abierta: "
+              f"{int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+              f"@ {self._cap.get(cv2.CAP_PROP_FPS):.0f} FPS")
+        return True
+
+    def read(self, out=None):
+        return self._cap.read(out)
+
+    def is_opened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+# ---------------------- Video grabado / secuencia de imágenes ----------------------
+
+class VideoFileSource(FrameSourcePort):
+    """
+    Reproduce un video o una secuencia de imágenes al ritmo indicado, en bucle.
+    path puede ser un archivo de video, un patrón tipo "frames/%04d.png",
+    un glob ("frames/*.jpg") o una carpeta con imágenes.
+    """
+
+    def __init__(self, path, fps=None, loop=True):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.name = f"file-{os.path.basename(path.rstrip('/')) or path}"
+        self._cap = None
+        self._images = None
+        self._index = 0
+        self._pacer = None
+
+    def open(self):
+        if os.path.isdir(self.path) or any(c in self.path for c in "*?["):
+            pattern = self.path if not os.path.isdir(self.path) else os.path.join(self.path, "*")
+            self._images = sorted(f for f in glob.glob(pattern) if f.lower().endswith(IMAGE_EXTENSIONS))
+            if not self._images:
+                print(f"[ERROR] No hay imágenes en {self.path}.")
+                return False
+            fps = self.fps or 30
+        else:
+            self._cap = cv2.VideoCapture(self.path)
+            if not self._cap.isOpened():
+                print(f"[ERROR] No se pudo abrir el video {self.path}.")
+                return False
+            fps = self.fps or self._cap.get(cv2.CAP_PROP_FPS) or 30
+
+        self._index = 0
+        self._pacer = _Pacer(fps)
+        print(f"[INFO] Reproduciendo {self.path} a {fps:.0f} FPS.")
+        return True
+
+    def read(self, out=None):
+        self._pacer.wait()
+        if self._images is not None:
+            if self._index >= len(self._images):
+                if not self.loop:
+                    self.release()
+                    return False, None
+                self._index = 0
+            frame = cv2.imread(self._images[self._index])
+            self._index += 1
+            return frame is not None, frame
+
+        success, frame = self._cap.read(out)
+        if not success and self.loop:
+            # Fin del video: volver al inicio
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self._cap.read(out)
+        if not success and not self.loop:
+            self.release()
+        return success, frame
+
+    def is_opened(self):
+        return self._images is not None or (self._cap is not None and self._cap.isOpened())
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self._images = None
+
+
+# ---------------------- Generador sintético ----------------------
+
+class SyntheticSource(FrameSourcePort):
+    """
+    Fotogramas generados: fondo con ruido leve y un círculo en movimiento.
+    Sirve para medir el pipeline completo sin cámara ni archivos.
+    """
+
+    def __init__(self, width=640, height=480, fps=30):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.name = "synthetic"
+        self._background = None
+        self._count = 0
+        self._pacer = None
+
+    def open(self):
+        rng = np.random.default_rng(0)
+        self._background = rng.integers(100, 140, (self.height, self.width, 3), dtype=np.uint8)
+        self._count = 0
+        self._pacer = _Pacer(self.fps)
+        return True
+
+    def read(self, out=None):
+        self._pacer.wait()
+        if out is not None and out.shape == self._background.shape:
+            frame = out
+            np.copyto(frame, self._background)
+        else:
+            frame = self._background.copy()
+        t = self._count / float(self.fps or 30)
+        cx = int(self.width * (0.5 + 0.35 * np.sin(t)))
+        cy = int(self.height * (0.5 + 0.35 * np.sin(2 * t)))
+        cv2.circle(frame, (cx, cy), 30, (80, 160, 220), -1)
+        cv2.putText(frame, str(self._count), (10, self.height - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        self._count += 1
+        return True, frame
+
+    def is_opened(self):
+        return self._background is not None
+
+    def release(self):
+        self._background = None
+
+
+# ---------------------- Selección por configuración ----------------------
+
+def build_frame_source(config=None, device=None):
+    """
+    Crea el origen de fotogramas según settings.BOARD_FRAME_SOURCE
+    (TYPE: "camera", "file" o "synthetic").
+    """
+    if config is None:
+        config = getattr(settings, "BOARD_FRAME_SOURCE", {})
+    source_type = config.get("TYPE", "camera")
+
+    if source_type == "camera":
+        return CameraSource(
+            device=config.get("DEVICE", 0) if device is None else device,
+            backend=config.get("BACKEND", "auto"),
+            width=config.get("WIDTH"),
+            height=config.get("HEIGHT"),
+            fps=config.get("FPS"),
+            fourcc=config.get("FOURCC"),
+            buffer_size=config.get("BUFFER_SIZE", 1),
+        )
+    if source_type == "file":
+        return VideoFileSource(config["PATH"], fps=config.get("FPS"), loop=config.get("LOOP", True))
+    if source_type == "synthetic":
+        return SyntheticSource(config.get("WIDTH") or 640, config.get("HEIGHT") or 480, config.get("FPS") or 30)
+    raise ValueError(f"Origen de fotogramas desconocido: {source_type}")
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from itertools import chain
+
+import cv2
+import numpy as np
+
+
+# Lotes anteriores que se revisan al buscar uno compatible para un trazo
+LOOKBACK = 32
+# Trazos con su arreglo int32 ya convertido (LRU)
+CACHE_SIZE = 100_000
+
+_arrays = OrderedDict()   # id(trazo) → (trazo, cantidad de puntos, arreglo, caja de los puntos)
+
+
+def is_eraser(stroke):
+    """Trazo de borrador: marcado con mode, o blanco en dibujos guardados antes de existir mode."""
+    mode = stroke.get("mode")
+    if mode is not None:
+        return mode == "eraser"
+    return [int(c) for c in stroke["color"]] == [255, 255, 255]
+
+
+def _cached(stroke):
+    points = stroke["points"]
+    key = id(stroke)
+    cached = _arrays.get(key)
+    if cached is not None and cached[0] is stroke and cached[1] == len(points):
+        _arrays.move_to_end(key)
+        return cached
+    array = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+    if len(array):
+        (x0, y0), (x1, y1) = array.min(axis=0).tolist(), array.max(axis=0).tolist()
+    else:
+        x0 = y0 = x1 = y1 = 0
+    # Se guarda el trazo junto al arreglo para que su id no se reutilice mientras esté en caché
+    cached = _arrays[key] = (stroke, len(points), array, (x0, y0, x1, y1))
+    if len(_arrays) > CACHE_SIZE:
+        _arrays.popitem(last=False)
+    return cached
+
+
+def stroke_points(stroke):
+    """Puntos del trazo como arreglo int32 (N, 2), convertido una sola vez por trazo."""
+    return _cached(stroke)[2]
+
+
+def flat_points(strokes):
+    """Puntos de todos los trazos en un solo arreglo float64 (N, 2) y la cantidad de cada trazo."""
+    counts = np.fromiter((len(stroke["points"]) for stroke in strokes), np.int64, len(strokes))
+    values = chain.from_iterable(chain.from_iterable(stroke["points"] for stroke in strokes))
+    return np.fromiter(values, np.float64, int(counts.sum()) * 2).reshape(-1, 2), counts
+
+
+def scaled_arrays(strokes, scale):
+    """
+    Puntos de los trazos multiplicados por scale = (sx, sy) y redondeados a int32, convertidos
+    todos juntos (sin pasar por la caché): una lista de arreglos (N, 2) y la caja de cada uno.
+    """
+    xy, counts = flat_points(strokes)
+    xy = np.rint(xy * scale).astype(np.int32)
+    arrays = np.split(xy, np.cumsum(counts)[:-1])
+    boxes = [(0, 0, 0, 0)] * len(strokes)
+    filled = np.flatnonzero(counts)
+    if len(filled):
+        starts = (np.cumsum(counts) - counts)[filled]
+        low = np.minimum.reduceat(xy, starts).tolist()
+        high = np.maximum.reduceat(xy, starts).tolist()
+        for i, (x0, y0), (x1, y1) in zip(filled.tolist(), low, high):
+            boxes[i] = (x0, y0, x1, y1)
+    return arrays, boxes
+
+
+def _entries(strokes, scale):
+    """(trazo, cantidad de puntos, arreglo, caja, grosor) de cada trazo, escalados si scale no es None."""
+    if scale is None:
+        for stroke in strokes:
+            _, count, array, box = _cached(stroke)
+            yield stroke, count, array, box, int(stroke["thickness"])
+        return
+    strokes = list(strokes)
+    arrays, boxes = scaled_arrays(strokes, scale)
+    for stroke, array, box in zip(strokes, arrays, boxes):
+        yield stroke, len(array), array, box, max(1, int(round(float(stroke["thickness"]) * scale[1])))
+
+
+class _Batch:
+    __slots__ = ("color", "thickness", "eraser", "arrays", "box")
+
+    def __init__(self, color, thickness, eraser, array, box):
+        self.color = color
+        self.thickness = thickness
+        self.eraser = eraser
+        self.arrays = [array]
+        self.box = box
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def batch_strokes(strokes, scale=None):
+    """
+    Agrupa los trazos por (color, grosor, borrador) sin alterar el resultado:
+    un trazo se suma a un lote anterior solo si ningún trazo dibujado después
+    de ese lote se cruza con su caja; si no, abre un lote nuevo.
+    scale: (sx, sy) para rasterizar a otra escala; el grosor escala con sy.
+    """
+    batches = []
+    for stroke, count, array, (x0, y0, x1, y1), thickness in _entries(strokes, scale):
+        if count < 2:
+            continue
+        color = tuple(int(c) for c in stroke["color"])
+        eraser = is_eraser(stroke)
+        pad = thickness // 2 + 1
+        box = (x0 - pad, y0 - pad, x1 + pad, y1 + pad)
+
+        target = None
+        for batch in reversed(batches[-LOOKBACK:]):
+            if batch.color == color and batch.thickness == thickness and batch.eraser == eraser:
+                target = batch
+                break
+            if _overlaps(batch.box, box):
+                break
+        if target is None:
+            batches.append(_Batch(color, thickness, eraser, array, box))
+        else:
+            target.arrays.append(array)
+            b = target.box
+            target.box = (min(b[0], box[0]), min(b[1], box[1]), max(b[2], box[2]), max(b[3], box[3]))
+    return batches
+
+
+def draw_strokes(canvas, strokes, coverage=None, scale=None):
+    """
+    Dibuja los trazos en orden con un cv2.polylines por lote.
+    coverage: máscara uint8 de la capa de tinta; el trazo la marca con 1
+    y el borrador la limpia con 0 (deja ver el fondo).
+    scale: (sx, sy) que lleva las coordenadas de los trazos a píxeles de canvas.
+    """
+    for batch in batch_strokes(strokes, scale):
+        cv2.polylines(canvas, batch.arrays, False, batch.color, batch.thickness)
+        if coverage is not None:
+            cv2.polylines(coverage, batch.arrays, False, 0 if batch.eraser else 1, batch.thickness)
+
+
+def render_strokes(strokes, width, height, scale=None):
+    """
+    Imagen de los trazos sobre fondo blanco (miniaturas y exportación).
+    Con scale se rasterizan directo al tamaño pedido: el costo depende de los píxeles de salida.
+    """
+    canvas = np.full((height, width, 3), 255, np.uint8)
+    draw_strokes(canvas, strokes, scale=scale)
+    return canvas
@@ -1,2 +1,226 @@
-import cv2
-cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+import atexit
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from django.conf import settings
+
+from board.application.use_cases.shared_frames import SharedFrameRing
+from board.infrastructure.opencv.frame_sources import build_frame_source
+
+# Fotograma capturado: número de secuencia, marca de tiempo y la imagen BGR.
+# frame es una vista del buffer compartido: válida mientras el lector no
+# vuelva a usar su ranura (ring_size - 1 fotogramas), ver is_current().
+CapturedFrame = namedtuple("CapturedFrame", ["seq", "timestamp", "frame"])
+
+
+class CaptureManager:
+    """
+    Lector de un origen de fotogramas (cámara, video, sintético) con un hilo dedicado.
+    El origen decodifica directamente en las ranuras de un SharedFrameRing, así los
+    consumidores (también de otros procesos, vía ring.name) leen el fotograma sin
+    copias ni bloqueos sobre el dispositivo y sin acumular retraso.
+    """
+
+    def __init__(self, source, ring_size=3):
+        self.source = source
+        self.ring_size = ring_size
+        self.ring = None
+        self._retired = []    # buffers de una resolución anterior (aún pueden tener lectores)
+        self._cond = threading.Condition()
+        # Secuencia propia del lector: solo crece, aunque se cambie de buffer al cambiar la resolución
+        self._seq = 0
+        self._published = OrderedDict()   # seq → (buffer, ranura, seq en el buffer, marca de tiempo)
+        self._thread = None
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Abre el origen y lanza el hilo lector (idempotente)."""
+        with self._cond:
+            if self._running:
+                return self
+            if not self.source.open():
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, name=f"capture-{self.source.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el hilo lector y libera el origen."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self.source.release()
+        with self._cond:
+            for ring in self._retired + ([self.ring] if self.ring is not None else []):
+                ring.close()
+            self.ring = None
+            self._retired = []
+            self._published.clear()
+
+    def _reader_loop(self):
+        failures = 0
+        while self._running:
+            slot, dst = self.ring.begin_write(self._shape) if self.ring is not None else (None, None)
+            success, frame = self.source.read(dst)
+            if not success:
+                failures += 1
+                # El dispositivo desapareció o el video terminó
+                if failures > 50 or not self.source.is_opened():
+                    print(f"[ERROR] Origen {self.source.name} sin fotogramas, deteniendo lector.")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+            if frame is not dst:
+                # El origen no escribió en la ranura (primer fotograma, otra resolución o imágenes sueltas)
+                if self.ring is None or frame.shape != self._shape or frame.dtype != np.uint8:
+                    self._replace_ring(frame)
+                    slot, dst = self.ring.begin_write(self._shape)
+                np.copyto(dst, frame)
+            ring_seq = self.ring.commit(slot)
+            with self._cond:
+                self._seq += 1
+                self._published[self._seq] = (self.ring, slot, ring_seq, time.monotonic())
+                # Pasadas ring_size vueltas, las ranuras de los fotogramas viejos ya se reescribieron
+                while len(self._published) > self.ring_size:
+                    self._published.popitem(last=False)
+                self._close_retired()
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _replace_ring(self, frame):
+        if self.ring is not None:
+            self._retired.append(self.ring)
+        self._shape = frame.shape
+        self.ring = SharedFrameRing.for_shape(frame.shape, self.ring_size)
+        print(f"[INFO] Buffer compartido {self.ring.name} para {frame.shape[1]}x{frame.shape[0]}.")
+
+    def _close_retired(self):
+        """Cierra los buffers anteriores sin fotogramas publicados (nadie puede estar por leerlos)."""
+        live = {id(ring) for ring, *_ in self._published.values()}
+        for ring in [ring for ring in self._retired if id(ring) not in live]:
+            ring.close()
+            self._retired.remove(ring)
+
+    def _captured(self, seq):
+        published = self._published.get(seq)
+        if published is None:
+            return None
+        ring, slot, ring_seq, stamp = published
+        frame = ring.read(slot, ring_seq)
+        if frame is None:
+            return None
+        return CapturedFrame(seq, stamp, frame)
+
+    def is_current(self, captured):
+        """True si la vista de captured todavía no fue sobrescrita por el lector."""
+        with self._cond:
+            published = self._published.get(captured.seq)
+            if published is None:
+                return False
+            ring, slot, ring_seq, _ = published
+            return ring.is_current(slot, ring_seq)
+
+    def read(self, after_seq=0, timeout=1.0):
+        """
+        Espera un fotograma más nuevo que after_seq y devuelve el más reciente.
+        Devuelve None si vence el timeout o el lector se detuvo.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._running or self._seq > after_seq, timeout=timeout)
+            if self._seq > after_seq:
+                return self._captured(self._seq)
+        return None
+
+
+class CaptureRegistry:
+    """
+    Abre cada dispositivo con su primer usuario y lo libera cuando el último se va
+    y pasa idle_timeout segundos sin que nadie lo vuelva a pedir (evita reabrir la
+    cámara al recargar la página). Nada se abre al importar el módulo, así que
+    manage.py, migraciones y workers no tocan la cámara.
+    """
+
+    def __init__(self, idle_timeout=None):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._managers = {}   # device → CaptureManager
+        self._refs = {}       # device → usuarios activos
+        self._timers = {}     # device → liberación pendiente
+
+    def acquire(self, device=0):
+        """Devuelve el lector del dispositivo, abriéndolo si hace falta."""
+        with self._lock:
+            timer = self._timers.pop(device, None)
+            if timer is not None:
+                timer.cancel()
+            manager = self._managers.get(device)
+            if manager is None:
+                manager = self._managers[device] = CaptureManager(build_frame_source(device=device))
+            self._refs[device] = self._refs.get(device, 0) + 1
+        # Reabre también si el lector se detuvo por falta de fotogramas
+        return manager.start()
+
+    def release(self, device=0):
+        with self._lock:
+            refs = self._refs.get(device, 0) - 1
+            if refs > 0:
+                self._refs[device] = refs
+                return
+            self._refs.pop(device, None)
+            if device not in self._managers:
+                return
+            timeout = self._idle_timeout()
+            if timeout <= 0:
+                manager = self._managers.pop(device)
+            else:
+                timer = self._timers[device] = threading.Timer(timeout, self._close_if_idle, args=(device,))
+                timer.daemon = True
+                timer.start()
+                return
+        manager.stop()
+        print(f"[INFO] Origen {manager.source.name} liberado.")
+
+    def close_all(self):
+        with self._lock:
+            managers = list(self._managers.values())
+            for timer in self._timers.values():
+                timer.cancel()
+            self._managers.clear()
+            self._refs.clear()
+            self._timers.clear()
+        for manager in managers:
+            manager.stop()
+
+    def _idle_timeout(self):
+        if self.idle_timeout is not None:
+            return self.idle_timeout
+        return getattr(settings, "BOARD_FRAME_SOURCE", {}).get("IDLE_TIMEOUT", 5.0)
+
+    def _close_if_idle(self, device):
+        with self._lock:
+            if self._refs.get(device) or self._timers.get(device) is not threading.current_thread():
+                return
+            self._timers.pop(device)
+            manager = self._managers.pop(device, None)
+        if manager is not None:
+            manager.stop()
+            print(f"[INFO] Origen {manager.source.name} liberado tras {self._idle_timeout():.0f} s sin uso.")
+
+
+capture_registry = CaptureRegistry()
+# Liberar cámaras y memoria compartida al cerrar el servidor
+atexit.register(capture_registry.close_all)
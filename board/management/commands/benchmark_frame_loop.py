@@ -0,0 +1,120 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+
+
+class _DirectCapture:
+    """
+    Captura síncrona para el benchmark: la fuente escribe siempre en el mismo
+    buffer, como el lector de CaptureManager escribe en su ranura compartida.
+    """
+
+    running = True
+
+    def __init__(self, source):
+        from board.infrastructure.opencv.video_capture_manager import CapturedFrame
+        self._captured = CapturedFrame
+        self._source = source
+        self._frame = None
+        self._seq = 0
+
+    def read(self, after_seq=0, timeout=None):
+        ok, frame = self._source.read(self._frame)
+        if not ok:
+            return None
+        self._frame = frame
+        self._seq += 1
+        return self._captured(self._seq, time.monotonic(), frame)
+
+
+class _NoHands:
+    def process(self, frame, timestamp=None):
+        return []
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el bucle de la pizarra (captura → inferencia → lógica → composición → JPEG) "
+        "con fotogramas sintéticos, con y sin buffers preasignados: ms por fotograma, "
+        "memoria asignada por etapa y el ancho de banda de asignación a 30 FPS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=1280)
+        parser.add_argument("--height", type=int, default=720)
+        parser.add_argument("--frames", type=int, default=120, help="Fotogramas medidos por modo.")
+        parser.add_argument("--no-inference", action="store_true",
+                            help="Omitir MediaPipe (mide solo el resto del bucle).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Resolución {options['width']}x{options['height']}, "
+                          f"{options['frames']} fotogramas, inferencia: {'no' if options['no_inference'] else 'sí'}\n")
+        for buffer_pool in (False, True):
+            timing, allocations = self._run(buffer_pool, options)
+            self._report(buffer_pool, timing, allocations)
+
+    def _run(self, buffer_pool, options):
+        from board.application.use_cases.sync import FrameBoard
+        from board.application.use_cases.video_stream import (
+            BoardSession, build_board_pipeline, build_hand_tracker,
+        )
+        from board.infrastructure.opencv.frame_sources import SyntheticSource
+
+        source = SyntheticSource(options["width"], options["height"], fps=0)
+        source.open()
+        detector = None
+        if options["no_inference"]:
+            tracker = _NoHands()
+        else:
+            import mediapipe as mp
+            detector = mp.solutions.hands.Hands(max_num_hands=1)
+            tracker = build_hand_tracker(detector, buffer_pool=buffer_pool)
+
+        # keepalive=0: se compone y codifica cada fotograma aunque la pizarra no cambie
+        pipeline = build_board_pipeline(BoardSession(), tracker, _DirectCapture(source), keepalive=0,
+                                        preview=FrameBoard(), buffer_pool=buffer_pool)
+        try:
+            # Calentamiento: reserva de buffers, caché de iconos y primeras inferencias
+            for _ in range(10):
+                pipeline.run_once()
+
+            start = time.perf_counter()
+            for _ in range(options["frames"]):
+                pipeline.run_once()
+            timing = (time.perf_counter() - start) / options["frames"]
+
+            # Asignaciones en una pasada aparte: tracemalloc deforma los tiempos
+            allocations = {}
+            measured = min(options["frames"], 30)
+
+            @contextmanager
+            def measure(stage_name):
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                yield
+                allocations[stage_name] = allocations.get(stage_name, 0) + tracemalloc.get_traced_memory()[1] - baseline
+
+            tracemalloc.start()
+            try:
+                for _ in range(measured):
+                    pipeline.run_once(measure=measure)
+            finally:
+                tracemalloc.stop()
+            allocations = {name: total / measured for name, total in allocations.items()}
+        finally:
+            source.release()
+            if detector is not None:
+                detector.close()
+        return timing, allocations
+
+    def _report(self, buffer_pool, timing, allocations):
+        total = sum(allocations.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Buffers preasignados: {'sí' if buffer_pool else 'no'}"))
+        self.stdout.write(f"  {timing * 1e3:8.2f} ms/fotograma ({1.0 / timing:.0f} FPS)")
+        for stage_name, size in allocations.items():
+            self.stdout.write(f"  {size / 1024:10.1f} KiB  {stage_name}")
+        self.stdout.write(f"  {total / 1024:10.1f} KiB asignados por fotograma "
+                          f"→ {total * 30 / 1e6:.1f} MB/s a 30 FPS\n")
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+# Colores de la paleta más usados (BGR); el blanco es el borrador de los dibujos antiguos
+PALETTE = [(0, 0, 0), (0, 0, 255), (255, 0, 0), (0, 160, 0), (0, 200, 255), (255, 255, 255)]
+
+
+def _segment_by_segment(strokes, width, height):
+    """Renderizado anterior: un cv2.line por par de puntos (referencia)."""
+    import cv2
+    import numpy as np
+
+    canvas = np.ones((height, width, 3), np.uint8) * 255
+    for stroke in strokes:
+        color = tuple(int(c) for c in stroke["color"])
+        thickness = int(stroke["thickness"])
+        pts = stroke["points"]
+        for i in range(1, len(pts)):
+            cv2.line(canvas, tuple(pts[i - 1]), tuple(pts[i]), color, thickness)
+    return canvas
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide render_strokes con un dibujo sintético de muchos trazos: "
+        "un cv2.line por segmento frente al renderizador por lotes de polilíneas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strokes", type=int, default=10_000)
+        parser.add_argument("--points", type=int, default=40, help="Puntos promedio por trazo.")
+        parser.add_argument("--width", type=int, default=1280)
+        parser.add_argument("--height", type=int, default=720)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        import numpy as np
+
+        from board.infrastructure.opencv import stroke_renderer
+
+        width, height = options["width"], options["height"]
+        strokes = self._drawing(options["strokes"], options["points"], width, height)
+        segments = sum(len(s["points"]) - 1 for s in strokes)
+        self.stdout.write(f"{len(strokes)} trazos, {segments} segmentos, lienzo {width}x{height}\n")
+
+        reference, old = self._time(_segment_by_segment, strokes, width, height, options["repeat"])
+        stroke_renderer._arrays.clear()
+        start = time.perf_counter()
+        stroke_renderer.render_strokes(strokes, width, height)
+        cold = time.perf_counter() - start
+        image, warm = self._time(stroke_renderer.render_strokes, strokes, width, height, options["repeat"])
+
+        batches = len(stroke_renderer.batch_strokes(strokes))
+        different = int(np.any(reference != image, axis=2).sum())
+        self.stdout.write(f"  {old * 1e3:9.1f} ms  cv2.line por segmento")
+        self.stdout.write(f"  {cold * 1e3:9.1f} ms  polilíneas por lotes (conversión a int32 incluida)")
+        self.stdout.write(f"  {warm * 1e3:9.1f} ms  polilíneas por lotes (arreglos en caché)")
+        self.stdout.write(f"  {batches} llamadas a cv2.polylines, {old / warm:.1f}x más rápido")
+        style = self.style.SUCCESS if different == 0 else self.style.WARNING
+        self.stdout.write(style(f"  Píxeles distintos entre ambos: {different}"))
+
+    def _drawing(self, count, points, width, height):
+        """Trazos tipo mano alzada (paseos aleatorios) con pocos colores y grosores."""
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        strokes = []
+        for _ in range(count):
+            n = max(2, int(rng.integers(points // 2, points * 3 // 2 + 1)))
+            start = rng.integers(0, [width, height])
+            path = np.clip(start + np.cumsum(rng.integers(-6, 7, (n, 2)), axis=0), 0, [width - 1, height - 1])
+            strokes.append({
+                "points": path.tolist(),
+                "color": list(PALETTE[int(rng.integers(0, len(PALETTE)))]),
+                "thickness": int(rng.choice([3, 5, 8, 12])),
+            })
+        return strokes
+
+    def _time(self, render, strokes, width, height, repeat):
+        best, image = None, None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            image = render(strokes, width, height)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return image, best
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Módulos que solo deberían cargarse al abrir un stream
+HEAVY_MODULES = ("mediapipe", "cv2", "numpy", "tensorflow", "jax", "matplotlib")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de importación del arranque web (settings, urls, asgi) "
+        "con python -X importtime y avisa si se cargan OpenCV/MediaPipe antes de tiempo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15, help="Cantidad de paquetes a listar.")
+        parser.add_argument("--module", action="append", default=[],
+                            help="Módulo extra a importar en la medición (repetible).")
+
+    def handle(self, *args, **options):
+        modules = [settings.ROOT_URLCONF]
+        asgi_app = getattr(settings, "ASGI_APPLICATION", None)
+        if asgi_app:
+            modules.append(asgi_app.rsplit(".", 1)[0])
+        modules += options["module"]
+
+        code = "import django; django.setup()\n" + "".join(f"import {m}\n" for m in modules)
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "virtualboard.settings"))
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            self.stderr.write(result.stderr.strip().splitlines()[-1])
+            return
+
+        # Formato: "import time: self [us] | cumulative | <sangría>paquete"
+        totals = {}
+        loaded = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            loaded.add(name.strip())
+            if not name.startswith("  "):
+                # Solo importaciones de primer nivel: su acumulado ya incluye a los hijos
+                package = name.strip().split(".")[0]
+                totals[package] = totals.get(package, 0) + int(cumulative)
+
+        total = sum(totals.values())
+        self.stdout.write(f"Importando: {', '.join(modules)}")
+        self.stdout.write(f"Tiempo total: {total / 1e6:.3f} s\n")
+        for package, micros in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:options["top"]]:
+            self.stdout.write(f"  {micros / 1e3:9.1f} ms  {package}")
+
+        heavy = [m for m in HEAVY_MODULES if m in loaded]
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"\nCargados en el arranque: {', '.join(heavy)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nSin OpenCV/MediaPipe en el arranque."))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0003_drawing_user'),
+    ]
+
+    operations = [
+        # Los dibujos existentes guardan píxeles absolutos; los nuevos, coordenadas normalizadas
+        migrations.AddField(
+            model_name='drawing',
+            name='normalized',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='drawing',
+            name='normalized',
+            field=models.BooleanField(default=True),
+        ),
+    ]
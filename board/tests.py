@@ -1,3 +1,315 @@
-from django.test import TestCase
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from board.application.actions import save_action, undo_redo_action
+from board.application.use_cases.ink_keyframes import InkKeyframes
+from board.application.use_cases.stroke_coordinates import normalize_strokes
+from board.application.use_cases.stroke_index import StrokeIndex
+from board.application.use_cases.vector_eraser import split_stroke
+from board.infrastructure.django.models import Drawing
+from board.infrastructure.opencv.stroke_renderer import batch_strokes, draw_strokes, render_strokes
+from board.management.commands.benchmark_strokes import Command as BenchmarkStrokes, _segment_by_segment
+
+
+def stroke(points, color=(0, 0, 0), thickness=5, mode="draw"):
+    return {"points": [list(p) for p in points], "color": list(color), "thickness": thickness, "mode": mode}
+
+
+def sample_drawing(count, width, height):
+    """Dibujo sintético del benchmark (con trazos blancos de borrador antiguo)."""
+    return BenchmarkStrokes()._drawing(count, 20, width, height)
+
+
+class BoardStateTestCase(TestCase):
+    """Deja el estado global de la pizarra (trazos, historial, lienzo) limpio en cada prueba."""
+
+    def setUp(self):
+        save_action.reset_globals()
+        undo_redo_action.reset_history()
+        self._frame_size = save_action._frame_size
+        save_action._frame_size = None
+        # Sin pausa entre deshacer/rehacer seguidos
+        self._cooldown = undo_redo_action._cooldown
+        undo_redo_action._cooldown = 0
+
+    def tearDown(self):
+        save_action._frame_size = self._frame_size
+        undo_redo_action._cooldown = self._cooldown
+        undo_redo_action.reset_history()
+        save_action.reset_globals()
+
+    def add_strokes(self, strokes):
+        for s in strokes:
+            white = list(s["color"]) == [255, 255, 255]
+            save_action.add_stroke(s["points"], s["color"], s["thickness"], mode="eraser" if white else "draw")
+
+
+# ---------------------- Borrador vectorial ----------------------
+
+class SplitStrokeTests(TestCase):
+
+    def test_untouched_stroke_returns_none(self):
+        self.assertIsNone(split_stroke(stroke([(0, 0), (100, 0)]), [(50, 80)], 10))
+
+    def test_cut_in_the_middle_keeps_original_ends(self):
+        pieces = split_stroke(stroke([(0, 0), (100, 0)], thickness=2), [(50, -20), (50, 20)], 5)
+        self.assertEqual(len(pieces), 2)
+        self.assertEqual(pieces[0]["points"][0], [0, 0])
+        self.assertEqual(pieces[1]["points"][-1], [100, 0])
+        # Ningún punto que quede está al alcance del borrador (radio + medio grosor)
+        for piece in pieces:
+            for x, _ in piece["points"]:
+                self.assertGreater(abs(x - 50), 5 + 1)
+            self.assertEqual(piece["color"], [0, 0, 0])
+
+    def test_fully_covered_stroke_is_removed(self):
+        self.assertEqual(split_stroke(stroke([(10, 10), (12, 10)]), [(11, 10)], 20), [])
+
+
+class ApplyEditTests(BoardStateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_strokes([
+            stroke([(10, 10), (10, 200)]),
+            stroke([(50, 100), (250, 100)], color=(0, 0, 255)),
+            stroke([(300, 10), (300, 200)]),
+        ])
+        self.before = list(save_action.current_strokes)
+        self.events = []
+        save_action.board_events.subscribe(self.events.append)
+        self.addCleanup(save_action.board_events.unsubscribe, self.events.append)
+
+    def test_erase_splices_pieces_in_place(self):
+        edit = save_action.erase_along([(150, 60), (150, 140)], 20)
+        strokes = save_action.current_strokes
+        self.assertEqual(len(strokes), 4)
+        self.assertIs(strokes[0], self.before[0])
+        self.assertIs(strokes[3], self.before[2])
+        self.assertEqual([s["color"] for s in strokes[1:3]], [[0, 0, 255]] * 2)
+        splices = [e["splices"] for e in self.events if e["type"] == "strokes_edit"]
+        self.assertEqual(splices, [[[1, 1, strokes[1:3]]]])
+        self.assertEqual(edit.first_index, 1)
+
+    def test_undo_and_redo_restore_the_same_strokes(self):
+        edit = save_action.erase_along([(150, 60), (150, 140)], 20)
+        pieces = save_action.current_strokes[1:3]
+        self.assertTrue(save_action.apply_edit(edit, undo=True))
+        self.assertEqual([id(s) for s in save_action.current_strokes], [id(s) for s in self.before])
+        self.assertTrue(save_action.apply_edit(edit))
+        self.assertEqual([id(s) for s in save_action.current_strokes[1:3]], [id(s) for s in pieces])
+        # El índice espacial devuelve los trozos en el lugar del original
+        index = save_action.get_stroke_index()
+        self.assertEqual(index.strokes_in_cells(index.cells_in_rect(0, 0, 400, 250)), save_action.current_strokes)
+
+    def test_stale_edit_is_rejected_without_changes(self):
+        edit = save_action.erase_along([(150, 60), (150, 140)], 20)
+        save_action.reset_strokes()
+        self.assertFalse(save_action.apply_edit(edit, undo=True))
+        self.assertEqual(save_action.current_strokes, [])
+
+
+class UndoRedoOrderTests(BoardStateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_strokes([stroke([(10, 100), (300, 100)]), stroke([(10, 200), (300, 200)])])
+        self.edit = save_action.erase_along([(150, 50), (150, 250)], 10)
+        undo_redo_action.register_edit(self.edit)
+
+    def test_latest_change_is_undone_first(self):
+        save_action.add_stroke([[400, 10], [400, 300]], (255, 0, 0), 5)
+        self.assertIsNone(undo_redo_action._pending_edit())
+        self.assertIsInstance(undo_redo_action.undo_last_stroke(), dict)
+        self.assertIs(undo_redo_action._pending_edit(), self.edit)
+        self.assertIs(undo_redo_action.undo_last_stroke(), self.edit)
+        self.assertEqual(len(save_action.current_strokes), 2)
+
+    def test_redo_reapplies_the_edit(self):
+        undo_redo_action.undo_last_stroke()
+        self.assertIs(undo_redo_action.redo_last_stroke(), self.edit)
+        self.assertEqual(len(save_action.current_strokes), 4)
+        self.assertIs(undo_redo_action._pending_edit(), self.edit)
+
+    def test_edits_of_a_previous_drawing_are_dropped(self):
+        save_action.reset_strokes()
+        self.assertIsNone(undo_redo_action._pending_edit())
+        self.assertEqual(undo_redo_action.undo_stack, [])
+
+
+# ---------------------- Renderizado y estructuras ----------------------
+
+class BatchStrokesTests(TestCase):
+
+    def test_batches_match_segment_by_segment_rendering(self):
+        strokes = sample_drawing(400, 320, 240)
+        self.assertLess(len(batch_strokes(strokes)), len(strokes))
+        reference = _segment_by_segment(strokes, 320, 240)
+        image = render_strokes(strokes, 320, 240)
+        self.assertEqual(int(np.any(reference != image, axis=2).sum()), 0)
+
+
+class StrokeIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = StrokeIndex(cell_size=32)
+        self.a = stroke([(10, 10), (100, 10)])
+        self.b = stroke([(50, 0), (50, 100)])
+        self.c = stroke([(200, 200), (220, 220)])
+        self.index.rebuild([self.a, self.b, self.c])
+
+    def test_queries_return_drawing_order(self):
+        self.assertEqual(self.index.query_rect(0, 0, 120, 120), [self.a, self.b])
+        self.assertEqual(self.index.query_rect(190, 190, 230, 230), [self.c])
+        self.assertEqual(self.index.hit_test(50, 10), [self.b, self.a])
+        self.assertEqual(self.index.hit_test(150, 150), [])
+
+    def test_replaced_pieces_keep_the_original_order(self):
+        left, right = stroke([(10, 10), (40, 10)]), stroke([(60, 10), (100, 10)])
+        self.index.replace(self.a, [left, right])
+        self.assertNotIn(self.a, self.index)
+        self.assertEqual(self.index.query_rect(0, 0, 120, 120), [left, right, self.b])
+
+    def test_removed_stroke_is_not_found(self):
+        self.index.remove(self.b)
+        self.assertEqual(self.index.hit_test(50, 50), [])
+        self.assertEqual(len(self.index), 2)
+
+
+class InkKeyframesTests(TestCase):
+
+    def setUp(self):
+        self.strokes = sample_drawing(50, 160, 120)
+        self.ink = np.full((120, 160, 3), 255, np.uint8)
+        self.coverage = np.zeros((120, 160), np.uint8)
+
+    def full_draw(self, count):
+        ink, coverage = np.full_like(self.ink, 255), np.zeros_like(self.coverage)
+        draw_strokes(ink, self.strokes[:count], coverage)
+        return ink, coverage
+
+    def test_records_only_interval_multiples(self):
+        keyframes = InkKeyframes(interval=10)
+        for count in range(1, 31):
+            draw_strokes(self.ink, self.strokes[count - 1:count], self.coverage)
+            keyframes.record(count, self.ink, self.coverage)
+        self.assertEqual(keyframes.replay_cost(27), 7)
+        keyframes.discard_after(25)
+        self.assertEqual(keyframes.replay_cost(27), 7)
+        self.assertEqual(keyframes.replay_cost(19), 9)
+
+    def test_budget_drops_oldest_keyframes(self):
+        frame_bytes = self.ink.nbytes + self.coverage.nbytes
+        keyframes = InkKeyframes(interval=10, budget_bytes=2 * frame_bytes)
+        self.assertEqual(keyframes.capacity(frame_bytes), 2)
+        for count in (10, 20, 30):
+            keyframes.record(count, self.ink, self.coverage)
+        self.assertEqual(keyframes.replay_cost(15), 15)
+        self.assertEqual(keyframes.replay_cost(35), 5)
+
+    def test_restore_matches_a_full_draw(self):
+        keyframes = InkKeyframes(interval=10)
+        for count in range(1, 41):
+            draw_strokes(self.ink, self.strokes[count - 1:count], self.coverage)
+            keyframes.record(count, self.ink, self.coverage)
+        self.assertEqual(keyframes.restore(self.ink, self.coverage, self.strokes, 33), 3)
+        ink, coverage = self.full_draw(33)
+        np.testing.assert_array_equal(self.ink, ink)
+        np.testing.assert_array_equal(self.coverage, coverage)
+
+
+# ---------------------- Lienzo incremental ----------------------
+
+@override_settings(BOARD_HISTORY={"KEYFRAME_INTERVAL": 20, "KEYFRAME_BUDGET_MB": 64})
+class IncrementalCanvasTests(BoardStateTestCase):
+    """Tinta nueva, deshacer, rehacer y borrador dejan el lienzo igual que redibujarlo completo."""
+
+    H, W = 240, 320
+
+    def setUp(self):
+        from board.application.use_cases.video_stream import BoardSession
+
+        super().setUp()
+        self.add_strokes(sample_drawing(150, self.W, self.H))
+        self.session = BoardSession()
+        self.session.rebuild_canvas(self.H, self.W)
+
+    def assertMatchesRebuild(self):
+        from board.application.use_cases.video_stream import BoardSession
+
+        reference = BoardSession()
+        reference.rebuild_canvas(self.H, self.W)
+        np.testing.assert_array_equal(self.session.canvas, reference.canvas)
+
+    def test_new_strokes(self):
+        self.add_strokes(sample_drawing(30, self.W, self.H))
+        self.session.commit_strokes(self.H, self.W)
+        self.assertMatchesRebuild()
+
+    def test_undo_and_redo(self):
+        for action in ["undo"] * 25 + ["redo"] * 10:
+            self.session.handle_toolbar_action(action, self.H, self.W)
+            self.assertMatchesRebuild()
+        self.assertEqual(len(save_action.current_strokes), 135)
+
+    def test_vector_eraser_and_its_history(self):
+        path = [(40, 40), (120, 90), (200, 60), (280, 200)]
+        edit = save_action.erase_along(path, 30)
+        undo_redo_action.register_edit(edit)
+        self.session.refresh_strokes(self.H, self.W, edit)
+        self.assertMatchesRebuild()
+        for action in ("undo", "redo", "undo"):
+            self.session.handle_toolbar_action(action, self.H, self.W)
+            self.assertMatchesRebuild()
+        self.assertEqual(len(save_action.current_strokes), 150)
+
+
+# ---------------------- Regresiones ----------------------
+
+@override_settings(BOARD_CANVAS={}, BOARD_FRAME_SOURCE={"WIDTH": 640, "HEIGHT": 480})
+class FrameSizeTests(BoardStateTestCase):
+    """Un dibujo cargado antes del primer fotograma no se encoge al adoptar el tamaño de la cámara."""
+
+    def setUp(self):
+        super().setUp()
+        self.strokes = normalize_strokes([stroke([(1277, 717), (128, 72)], thickness=5)], 1280, 720)
+        self.drawing = Drawing.objects.create(
+            user=User.objects.create(username="pizarra"), name="Camara HD",
+            width=1280, height=720, strokes=self.strokes, normalized=True,
+        )
+
+    def test_loaded_strokes_are_derived_again_from_the_saved_drawing(self):
+        save_action.load_drawing(self.drawing.id)
+        save_action.adopt_frame_size(1280, 720)
+        self.assertEqual(save_action.canvas_size(), (1280, 720))
+        self.assertEqual(save_action.current_strokes[0]["points"], [[1277, 717], [128, 72]])
+        self.assertEqual(save_action.current_strokes[0]["thickness"], 5)
+        # Al guardar se escriben las mismas coordenadas que se cargaron
+        self.assertEqual(normalize_strokes(save_action.current_strokes, 1280, 720), self.strokes)
+
+    def test_edited_strokes_are_not_squeezed_into_another_aspect_ratio(self):
+        save_action.load_drawing(self.drawing.id)
+        save_action.add_stroke([[10, 10], [600, 400]], (0, 0, 255), 4)
+        points = [list(s["points"]) for s in save_action.current_strokes]
+        save_action.adopt_frame_size(1280, 720)
+        self.assertEqual([s["points"] for s in save_action.current_strokes], points)
+
+
+class JoinBoardTests(BoardStateTestCase):
+    """Un visor que se suma a la pizarra en curso no borra los trazos de los demás."""
+
+    def test_running_board_is_not_reset(self):
+        from board.application.use_cases.video_stream import BoardEngine, join_board
+
+        engine = BoardEngine()
+        save_action.add_stroke([[10, 10], [50, 50]], (0, 0, 0), 3)
+        engine._pipeline = object()   # motor en marcha, sin cámara
+        join_board(engine)
+        self.assertEqual(len(save_action.current_strokes), 1)
+        self.assertFalse(engine.session._reset_requested)
+
+        engine._pipeline = None
+        join_board(engine)
+        self.assertEqual(save_action.current_strokes, [])
+        self.assertTrue(engine.session._reset_requested)
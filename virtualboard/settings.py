@@ -31,12 +31,15 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    # Primero: su runserver sirve ASGI (WebSocket de la pizarra y streams async)
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'channels',
     'board',
     'tailwind',
     'theme',
@@ -167,6 +170,87 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Rastreo de manos: "adaptive" salta inferencias y extrapola landmarks,
+# "every_frame" ejecuta MediaPipe en cada fotograma
+HAND_TRACKING = {
+    "MODE": "adaptive",
+    "TARGET_FPS": 30,
+    "MAX_INTERVAL": 4,
+    "IDLE_INTERVAL": 8,
+    "MOTION_THRESHOLD": 6.0,
+    # Entrada de inferencia: lado máximo del fotograma reducido y recorte alrededor de la mano
+    "INPUT_MAX_SIDE": 640,
+    "ROI": True,
+    "ROI_MARGIN": 0.5,
+    "ROI_SIZE": 320,
+}
+
+# Detectores de MediaPipe Hands precalentados al arrancar el servidor
+# BACKEND "thread": inferencia en el proceso web (pool de POOL_SIZE detectores)
+# BACKEND "process": WORKERS procesos de inferencia compartidos por todas las pizarras
+HAND_DETECTORS = {
+    "BACKEND": "thread",
+    "POOL_SIZE": 1,               # uno por pizarra que se espera en simultáneo
+    "WORKERS": 2,
+    "WARM_ON_START": True,
+    "READY_TIMEOUT": 30.0,        # segundos que una pizarra espera a los procesos al arrancar
+    "MAX_NUM_HANDS": 1,
+    "MIN_DETECTION_CONFIDENCE": 0.8,
+    "MIN_TRACKING_CONFIDENCE": 0.75,
+}
+
+# Vista previa lateral de la cámara (canvas.html)
+CAMERA_PREVIEW = {
+    "WIDTH": 320,
+    "FPS": 15,
+    "QUALITY": 75,
+}
+
+# Origen de fotogramas de la pizarra
+# TYPE: "camera" (BACKEND "auto" = DirectShow en Windows, V4L2 en Linux),
+#       "file" (video, carpeta o patrón de imágenes en PATH, en bucle a FPS)
+#       o "synthetic" (generado, para CI y benchmarks)
+BOARD_FRAME_SOURCE = {
+    "TYPE": os.getenv("BOARD_FRAME_SOURCE", "camera"),
+    "DEVICE": 0,
+    "BACKEND": "auto",
+    "WIDTH": None,
+    "HEIGHT": None,
+    "FPS": None,
+    "FOURCC": None,   # p. ej. "MJPG" para 720p a 30 FPS en webcams USB
+    "BUFFER_SIZE": 1,
+    "PATH": os.getenv("BOARD_FRAME_PATH", ""),
+    "LOOP": True,
+    "IDLE_TIMEOUT": 5.0,   # segundos que se mantiene abierto tras el último visor
+}
+
+# Stream MJPEG de la pizarra: con el estado sin cambios solo se reenvía
+# un fotograma cada KEEPALIVE segundos (None = ninguno)
+BOARD_STREAM = {
+    "KEEPALIVE": 1.0,
+    # Voltear, reducir y componer sobre buffers preasignados (uno por resolución)
+    "BUFFER_POOL": True,
+}
+
+# Deshacer/rehacer: copia de la capa de tinta cada KEYFRAME_INTERVAL trazos,
+# hasta KEYFRAME_BUDGET_MB por pizarra (se descartan las más antiguas)
+BOARD_HISTORY = {
+    "KEYFRAME_INTERVAL": 20,
+    "KEYFRAME_BUDGET_MB": 64,
+}
+
+# Lienzo de la pizarra: WIDTH x HEIGHT fija el lienzo en vivo (None = el tamaño del primer
+# fotograma de la cámara; los dibujos se guardan normalizados y se escalan al cargarlos);
+# tamaño de los tiles que se redibujan al deshacer o borrar (también es la celda del índice
+# espacial de trazos); ancho de las miniaturas y lado máximo de las imágenes exportadas
+BOARD_CANVAS = {
+    "WIDTH": None,
+    "HEIGHT": None,
+    "TILE_SIZE": 64,
+    "THUMBNAIL_WIDTH": 320,
+    "EXPORT_MAX_SIDE": 4096,
+}
+
 # CORS dev
 CORS_ALLOW_ALL_ORIGINS = True
 